@@ -0,0 +1,63 @@
+"""reservation_daily_stats
+
+Revision ID: 27de303f0a62
+Revises: 9a363cdaff39
+Create Date: 2026-10-18 10:41:07.118394
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '27de303f0a62'
+down_revision = '9a363cdaff39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reservation_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('people_count', sa.Integer(), nullable=False),
+    sa.Column('served', sa.Boolean(), nullable=False),
+    sa.Column('reservations_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('day', 'people_count', 'served')
+    )
+    op.execute("""
+        CREATE FUNCTION reservations_daily_stats_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE reservation_daily_stats
+                SET reservations_count = reservations_count - 1
+                WHERE day = date_trunc('day', OLD.date_reservation)::date
+                    AND people_count = OLD.people_count
+                    AND served = OLD.served;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO reservation_daily_stats (day, people_count, served, reservations_count)
+                VALUES (date_trunc('day', NEW.date_reservation)::date, NEW.people_count, NEW.served, 1)
+                ON CONFLICT (day, people_count, served)
+                DO UPDATE SET reservations_count = reservation_daily_stats.reservations_count + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER reservations_daily_stats
+        AFTER INSERT OR DELETE OR UPDATE OF date_reservation, people_count, served ON reservations
+        FOR EACH ROW EXECUTE FUNCTION reservations_daily_stats_apply()
+    """)
+    op.execute("""
+        INSERT INTO reservation_daily_stats (day, people_count, served, reservations_count)
+        SELECT date_trunc('day', date_reservation)::date, people_count, served, count(*)
+        FROM reservations
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER reservations_daily_stats ON reservations")
+    op.execute("DROP FUNCTION reservations_daily_stats_apply()")
+    op.drop_table('reservation_daily_stats')
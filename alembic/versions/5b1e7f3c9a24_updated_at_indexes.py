@@ -0,0 +1,33 @@
+"""updated_at_indexes
+
+Revision ID: 5b1e7f3c9a24
+Revises: fb8f5272a171
+Create Date: 2026-10-18 16:40:07.218305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e7f3c9a24'
+down_revision = 'fb8f5272a171'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # conditional GETs read max("updatedAt") on every poll, the index turns it into a single probe
+    with op.get_context().autocommit_block():
+        op.create_index('ix_events_updated_at', 'events', ['updatedAt'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_reservations_updated_at', 'reservations', ['updatedAt'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_menu_item_updated_at', 'menu_item', ['updatedAt'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_menu_item_updated_at', table_name='menu_item')
+    op.drop_index('ix_reservations_updated_at', table_name='reservations')
+    op.drop_index('ix_events_updated_at', table_name='events')
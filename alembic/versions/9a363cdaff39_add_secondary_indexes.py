@@ -0,0 +1,51 @@
+"""add_secondary_indexes
+
+Revision ID: 9a363cdaff39
+Revises: 4dcc1f4f47c3
+Create Date: 2026-10-18 09:12:41.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a363cdaff39'
+down_revision = '4dcc1f4f47c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CREATE INDEX CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_reservations_date_reservation_id', 'reservations', ['date_reservation', 'id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_reservations_date_reservation_served', 'reservations', ['date_reservation', 'served'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_reservations_people_count_id', 'reservations', ['people_count', 'id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_menu_item_category', 'menu_item', ['category'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_menu_item_sub_category', 'menu_item', ['sub_category'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_auth_user_username', 'auth_user', ['username'],
+                        unique=True, postgresql_concurrently=True)
+        op.create_index('ix_auth_user_name_trgm', 'auth_user', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+        op.create_index('ix_events_name_trgm', 'events', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_name_trgm', table_name='events')
+    op.drop_index('ix_auth_user_name_trgm', table_name='auth_user')
+    op.drop_index('ix_auth_user_username', table_name='auth_user')
+    op.drop_index('ix_menu_item_sub_category', table_name='menu_item')
+    op.drop_index('ix_menu_item_category', table_name='menu_item')
+    op.drop_index('ix_reservations_people_count_id', table_name='reservations')
+    op.drop_index('ix_reservations_date_reservation_served', table_name='reservations')
+    op.drop_index('ix_reservations_date_reservation_id', table_name='reservations')
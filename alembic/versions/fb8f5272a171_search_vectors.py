@@ -0,0 +1,45 @@
+"""search_vectors
+
+Revision ID: fb8f5272a171
+Revises: 27de303f0a62
+Create Date: 2026-10-18 14:02:19.538410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'fb8f5272a171'
+down_revision = '27de303f0a62'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_VECTORS = {
+    'events': "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+              "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+    'menu_item': "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+                 "setweight(to_tsvector('simple', coalesce(sub_name, '')), 'B') || "
+                 "setweight(to_tsvector('simple', coalesce(sub_category, '')), 'C')",
+    'auth_user': "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+                 "setweight(to_tsvector('simple', coalesce(username, '')), 'A')",
+}
+
+
+def upgrade() -> None:
+    for table_name, expression in SEARCH_VECTORS.items():
+        op.add_column(table_name, sa.Column(
+            'search_vector', postgresql.TSVECTOR(), sa.Computed(expression, persisted=True), nullable=True))
+    # CREATE INDEX CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        for table_name in SEARCH_VECTORS:
+            op.create_index(f'ix_{table_name}_search_vector', table_name, ['search_vector'], unique=False,
+                            postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    for table_name in SEARCH_VECTORS:
+        op.drop_index(f'ix_{table_name}_search_vector', table_name=table_name)
+        op.drop_column(table_name, 'search_vector')
@@ -0,0 +1,175 @@
+"""Table capacity over time for reservations.
+
+A reservation holds its tables for a fixed duration from date_reservation.
+Slots and reservations are both walked in start order, so a whole date
+range is answered from a single query without a lookup per slot.
+"""
+import math
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Iterable, NamedTuple
+
+
+class Booking(NamedTuple):
+    start: datetime
+    end: datetime
+    people_count: int
+
+
+class SlotCapacity(NamedTuple):
+    start: datetime
+    end: datetime
+    reservations: int
+    people_count: int
+    free_tables: int
+    free_seats: int
+    largest_free_table: int
+    overbooked: bool
+
+
+def get_table_combinations(tables: tuple[int, ...], party: int) -> list[tuple[int, ...]]:
+    """Sets of tables that seat party together with no spare table, fewest seats first.
+
+    tables must be sorted biggest first and each be too small for party on its own.
+    """
+    combinations = []
+
+    def extend(start: int, chosen: tuple[int, ...], seats: int):
+        previous = None
+        for position in range(start, len(tables)):
+            size = tables[position]
+            if size == previous:
+                continue
+            previous = size
+            if seats + size >= party:
+                combinations.append(chosen + (size,))
+            else:
+                extend(position + 1, chosen + (size,), seats + size)
+
+    extend(0, (), 0)
+    return sorted(combinations, key=lambda combination: (sum(combination), len(combination)))
+
+
+def remove_tables(free: tuple[int, ...], taken: Iterable[int]) -> tuple[int, ...]:
+    remaining = list(free)
+    for size in taken:
+        del remaining[bisect_left(remaining, size)]
+    return tuple(remaining)
+
+
+def assign_tables(party_sizes: Iterable[int], tables: Iterable[int]) -> list[int] | None:
+    """Seat parties biggest first, each at the smallest free table that fits it.
+
+    A party bigger than every free table is split over several, trying the
+    combinations with the fewest seats first and backtracking when a later
+    party does not fit. Empty parties take no table.
+    Returns the sorted sizes of the tables left free, or None if the parties do not fit.
+
+    >>> assign_tables([5, 4], [2, 4, 4])
+    []
+    >>> assign_tables([6, 3], [2, 2, 4, 4])
+    [2]
+    >>> assign_tables([5, 5], [2, 4, 4])
+    >>> assign_tables([10], [2, 4, 4, 6])
+    [2, 4]
+    >>> assign_tables([0, -1], [2])
+    [2]
+    """
+    parties = sorted((party for party in party_sizes if party > 0), reverse=True)
+    tables = sorted(tables)
+    if sum(parties) > sum(tables):
+        return None
+    failed = set()
+
+    def seat(index: int, free: tuple[int, ...]) -> tuple[int, ...] | None:
+        if index == len(parties):
+            return free
+        if (index, free) in failed:
+            return None
+        party = parties[index]
+        position = bisect_left(free, party)
+        if position < len(free):
+            # the smallest table that fits is never worse than a bigger one or a split
+            result = seat(index + 1, free[:position] + free[position + 1:])
+        else:
+            result = None
+            for combination in get_table_combinations(free[::-1], party):
+                result = seat(index + 1, remove_tables(free, combination))
+                if result is not None:
+                    break
+        if result is None:
+            failed.add((index, free))
+        return result
+
+    free = seat(0, tuple(tables))
+    return list(free) if free is not None else None
+
+
+def get_slots(date_from: date,
+              date_to: date,
+              opens_at: time,
+              closes_at: time,
+              slot_length: timedelta,
+              timezone: tzinfo) -> list[tuple[datetime, datetime]]:
+    slots = []
+    day = date_from
+    while day <= date_to:
+        opening = datetime.combine(day, opens_at, tzinfo=timezone)
+        closing = datetime.combine(day, closes_at, tzinfo=timezone)
+        if closing <= opening:
+            # open past midnight, the night belongs to the day it started
+            closing += timedelta(days=1)
+        start = opening
+        while start < closing:
+            slots.append((start, min(start + slot_length, closing)))
+            start += slot_length
+        day += timedelta(days=1)
+    return slots
+
+
+def get_slots_capacity(slots: list[tuple[datetime, datetime]],
+                       bookings: Iterable[Booking],
+                       tables: list[int]) -> list[SlotCapacity]:
+    """Sweep sorted slots and bookings together, keeping the bookings that overlap the current slot."""
+    bookings = sorted(bookings)
+    next_booking = 0
+    active = []
+    capacity = []
+    for slot_start, slot_end in slots:
+        while next_booking < len(bookings) and bookings[next_booking].start < slot_end:
+            active.append(bookings[next_booking])
+            next_booking += 1
+        active = [booking for booking in active if booking.end > slot_start]
+
+        free = assign_tables((booking.people_count for booking in active), tables)
+        capacity.append(SlotCapacity(
+            start=slot_start,
+            end=slot_end,
+            reservations=len(active),
+            people_count=sum(booking.people_count for booking in active),
+            free_tables=len(free) if free is not None else 0,
+            free_seats=sum(free) if free is not None else 0,
+            largest_free_table=free[-1] if free else 0,
+            overbooked=free is None
+        ))
+    return capacity
+
+
+def get_slot_numbers(booking: Booking, slot_length: timedelta) -> range:
+    """Fixed slots counted from the epoch that a booking touches, two overlapping bookings always share one."""
+    seconds = slot_length.total_seconds()
+    return range(math.floor(booking.start.timestamp() / seconds), math.ceil(booking.end.timestamp() / seconds))
+
+
+def can_seat(new_booking: Booking, bookings: Iterable[Booking], tables: list[int]) -> bool:
+    """Occupancy only grows where a booking starts, so those are the only instants to check."""
+    bookings = [booking for booking in bookings
+                if booking.start < new_booking.end and booking.end > new_booking.start]
+    instants = [new_booking.start]
+    instants.extend(booking.start for booking in bookings if booking.start > new_booking.start)
+    for instant in instants:
+        parties = [booking.people_count for booking in bookings if booking.start <= instant < booking.end]
+        parties.append(new_booking.people_count)
+        if assign_tables(parties, tables) is None:
+            return False
+    return True
@@ -0,0 +1,22 @@
+"""Rebuild the reservation_daily_stats rollup from the reservations table.
+
+Usage: python -m app.commands.backfill_reservation_stats
+"""
+import asyncio
+
+from app.main import database
+from app.repository.reservation import reservations_repo_factory
+
+
+async def main():
+    await database.connect()
+    try:
+        repository = reservations_repo_factory()
+        days_count = await repository.rebuild_daily_stats()
+        print(f"Rebuilt reservation statistics for {days_count} days")
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""Create the resized derivatives that are missing for referenced images.
+
+Usage: python -m app.commands.image_derivatives [--dry-run]
+
+Covers images uploaded before derivatives existed and uploads the worker
+skipped, failed on or lost on shutdown. Images whose derivatives are all
+on disk are left alone, so the command is safe to run repeatedly.
+"""
+import argparse
+import asyncio
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from app.images import Image, create_image_derivatives, get_missing_derivatives, get_static_path
+from app.models import Events, User
+
+
+async def create_missing_derivatives(database, dry_run: bool = False) -> dict:
+    report = {"scanned": 0, "complete": 0, "created": 0, "failed": 0}
+    for column in (Events.image, User.avatar):
+        async for row in database.iterate(select(column).where(column.isnot(None))):
+            path = get_static_path(row[0])
+            if path is None:
+                continue
+            report["scanned"] += 1
+            missing = get_missing_derivatives(path)
+            if not missing:
+                report["complete"] += 1
+                continue
+
+            print(f"{'would create' if dry_run else 'create'} {len(missing)} derivatives for {row[0]}")
+            if dry_run:
+                continue
+            try:
+                await run_in_threadpool(create_image_derivatives, path)
+            except Exception as error:
+                print(f"failed {row[0]}: {error}")
+                report["failed"] += 1
+            else:
+                report["created"] += 1
+    return report
+
+
+async def main(dry_run: bool):
+    from app.main import database
+
+    if Image is None:
+        raise SystemExit("Pillow is not installed")
+
+    await database.connect()
+    try:
+        report = await create_missing_derivatives(database, dry_run=dry_run)
+    finally:
+        await database.disconnect()
+    print(f"scanned {report['scanned']} images, complete {report['complete']}, "
+          f"created {report['created']}, failed {report['failed']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only report images with missing derivatives")
+    args = parser.parse_args()
+    asyncio.run(main(dry_run=args.dry_run))
@@ -0,0 +1,137 @@
+"""Delete files under the static directory that no event or user references.
+
+Usage: python -m app.commands.static_gc [--dry-run] [--grace-period SECONDS]
+
+Referenced names are streamed from the database into a set of stems, and
+the static tree is walked lazily with os.scandir, so memory grows with the
+number of referenced files rather than the number of files on disk.
+Resized derivatives and .br/.gz variants are kept while their original is
+referenced. Files younger than the grace period are never removed, which
+protects uploads whose database row has not been written yet; a repeated
+upload of an existing file refreshes its mtime for the same reason.
+Candidates are gathered in batches of at most RECHECK_BATCH_SIZE, and each
+batch is checked again against the database and its mtimes right before
+it is removed, so the walk never holds more than one batch of paths.
+"""
+import argparse
+import asyncio
+import os
+import re
+import time
+from typing import Iterator
+
+from sqlalchemy import func, select
+
+from app.models import Events, User
+from app.settings import settings
+
+STATIC_URL_PREFIX = "/static/"
+VARIANT_SUFFIX = re.compile(r"(\.br|\.gz)$")
+DERIVATIVE_SUFFIX = re.compile(r"_w\d+$")
+RECHECK_BATCH_SIZE = 1000
+
+
+def get_file_key(relative_path: str) -> str:
+    relative_path = VARIANT_SUFFIX.sub("", relative_path)
+    stem = os.path.splitext(relative_path)[0]
+    return DERIVATIVE_SUFFIX.sub("", stem)
+
+
+def walk_files(directory: str) -> Iterator[os.DirEntry]:
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+async def get_referenced_keys(database) -> set[str]:
+    referenced = set()
+    for column in (Events.image, User.avatar):
+        async for row in database.iterate(select(column).where(column.isnot(None))):
+            url = row[0]
+            if url.startswith(STATIC_URL_PREFIX):
+                referenced.add(get_file_key(url[len(STATIC_URL_PREFIX):]))
+    return referenced
+
+
+async def get_still_referenced_keys(database, keys: set[str]) -> set[str]:
+    urls = [STATIC_URL_PREFIX + key for key in keys]
+    referenced = set()
+    for column in (Events.image, User.avatar):
+        # stored urls point at originals, so dropping the extension gives their key
+        stem = func.regexp_replace(column, r"\.[^./]*$", "")
+        for row in await database.fetch_all(select(column).where(stem.in_(urls))):
+            referenced.add(get_file_key(row[0][len(STATIC_URL_PREFIX):]))
+    return referenced
+
+
+async def remove_candidates(database, candidates: list[tuple[str, str]], deadline: float,
+                            report: dict, dry_run: bool):
+    # uploads may have reused a candidate and saved its row while the tree was walked
+    referenced = await get_still_referenced_keys(
+        database, {get_file_key(relative_path) for _, relative_path in candidates})
+    for path, relative_path in candidates:
+        try:
+            stat_result = os.stat(path, follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        if get_file_key(relative_path) in referenced or stat_result.st_mtime > deadline:
+            report["kept"] += 1
+            continue
+
+        print(f"{'would delete' if dry_run else 'delete'} {relative_path} ({stat_result.st_size} bytes)")
+        if not dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+        report["deleted"] += 1
+        report["deleted_bytes"] += stat_result.st_size
+
+
+async def collect_static_garbage(database, grace_period: int, dry_run: bool = False) -> dict:
+    referenced = await get_referenced_keys(database)
+    static_dir = settings.STATIC_FILES_DIR
+    deadline = time.time() - grace_period
+    report = {"scanned": 0, "kept": 0, "deleted": 0, "deleted_bytes": 0}
+
+    candidates = []
+    for entry in walk_files(static_dir):
+        report["scanned"] += 1
+        relative_path = os.path.relpath(entry.path, static_dir).replace(os.sep, "/")
+        stat_result = entry.stat(follow_symlinks=False)
+        if get_file_key(relative_path) in referenced or stat_result.st_mtime > deadline:
+            report["kept"] += 1
+            continue
+        candidates.append((entry.path, relative_path))
+        if len(candidates) >= RECHECK_BATCH_SIZE:
+            await remove_candidates(database, candidates, deadline, report, dry_run)
+            candidates = []
+
+    if candidates:
+        await remove_candidates(database, candidates, deadline, report, dry_run)
+    return report
+
+
+async def main(grace_period: int, dry_run: bool):
+    from app.main import database
+
+    await database.connect()
+    try:
+        report = await collect_static_garbage(database, grace_period=grace_period, dry_run=dry_run)
+    finally:
+        await database.disconnect()
+    summary = "would delete" if dry_run else "deleted"
+    print(f"scanned {report['scanned']} files, kept {report['kept']}, "
+          f"{summary} {report['deleted']} ({report['deleted_bytes']} bytes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only report files that would be deleted")
+    parser.add_argument("--grace-period", type=int, default=settings.STATIC_GC_GRACE_PERIOD,
+                        help="minimum file age in seconds before it can be deleted")
+    args = parser.parse_args()
+    asyncio.run(main(grace_period=args.grace_period, dry_run=args.dry_run))
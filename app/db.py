@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, NamedTuple
+
+from databases import Database
+from databases.backends.postgres import PostgresBackend, PostgresConnection
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.compiler import Compiled
+from sqlalchemy.sql.ddl import DDLElement
+
+from app.cache import TTLCache
+from app.settings import settings
+
+COMPILED_QUERY_TTL = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+primary_written: ContextVar[bool] = ContextVar("primary_written", default=False)
+
+
+def mark_primary_written():
+    """Pin the rest of the current request to the primary so it reads its own writes."""
+    primary_written.set(True)
+
+
+class QueryStats:
+    def __init__(self, method: str, path: str, scope: dict = None):
+        self.method = method
+        self.path = path
+        self.scope = scope
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    @property
+    def route(self) -> str:
+        # the router stores the matched route in the scope, which gives the path template
+        route = self.scope.get("route") if self.scope else None
+        return f"{self.method} {getattr(route, 'path', self.path)}"
+
+    def record(self, elapsed: float, get_statement):
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = get_statement()
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_time * 1000:.2f};desc="{self.count} queries", ' \
+               f'db-slowest;dur={self.slowest_time * 1000:.2f}'
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+class PoolStats:
+    def __init__(self):
+        self.acquired = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, wait: float):
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def stats(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.total_wait, 6),
+            "wait_seconds_avg": round(self.total_wait / self.acquired, 6) if self.acquired else 0.0,
+            "wait_seconds_max": round(self.max_wait, 6),
+        }
+
+
+class InstrumentedPool:
+    """Wraps the asyncpg pool to time checkouts and enforce the acquire timeout."""
+
+    def __init__(self, pool, pool_stats: PoolStats, acquire_timeout: float):
+        self._pool = pool
+        self._pool_stats = pool_stats
+        self._acquire_timeout = acquire_timeout
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+    async def acquire(self, *, timeout: float = None):
+        pool_stats = self._pool_stats
+        pool_stats.waiting += 1
+        pool_stats.max_waiting = max(pool_stats.max_waiting, pool_stats.waiting)
+        started = time.perf_counter()
+        try:
+            connection = await self._pool.acquire(timeout=timeout or self._acquire_timeout)
+        except asyncio.TimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        finally:
+            pool_stats.waiting -= 1
+        pool_stats.record_wait(time.perf_counter() - started)
+        return connection
+
+
+class CompiledQuery(NamedTuple):
+    compiled: Compiled
+    query_str: str
+    param_keys: list
+    result_map: Any
+
+
+class CachedCompilePostgresConnection(PostgresConnection):
+    """Overrides the private _compile of databases' PostgresConnection.
+
+    It depends on _compile returning (sql, args, result_columns), on the
+    _dialect and _database attributes, and on SQLAlchemy's _bind_processors
+    and construct_params(extracted_parameters=...). databases and SQLAlchemy
+    are pinned in requirements.txt for this, re-check it before upgrading.
+    """
+
+    def _compile(self, query: ClauseElement) -> tuple[str, list, tuple]:
+        cache_key = None if isinstance(query, DDLElement) else query._generate_cache_key()
+        # expanding IN parameters change the rendered SQL with the number of values
+        if cache_key is None or any(bind.expanding for bind in cache_key.bindparams):
+            return super()._compile(query)
+
+        compiled_cache = self._database.compiled_cache
+        entry = compiled_cache.get(cache_key.key)
+        if entry is None:
+            compiled = query.compile(dialect=self._dialect, cache_key=cache_key)
+            if compiled.post_compile_params:
+                return super()._compile(query)
+            param_keys = sorted(compiled.params)
+            mapping = {key: "$" + str(i) for i, key in enumerate(param_keys, start=1)}
+            entry = CompiledQuery(compiled, compiled.string % mapping, param_keys, compiled._result_columns)
+            compiled_cache.set(cache_key.key, entry)
+
+        params = entry.compiled.construct_params(extracted_parameters=cache_key.bindparams, _check=False)
+        processors = entry.compiled._bind_processors
+        args = [
+            processors[key](params[key]) if key in processors else params[key]
+            for key in entry.param_keys
+        ]
+        return entry.query_str, args, entry.result_map
+
+
+class InstrumentedPostgresConnection(CachedCompilePostgresConnection):
+    """Times every statement for the per-request stats and logs slow ones."""
+
+    async def _timed(self, method, query: ClauseElement):
+        started = time.perf_counter()
+        try:
+            return await method(query)
+        finally:
+            self.record_query(query, time.perf_counter() - started)
+
+    def record_query(self, query: ClauseElement, elapsed: float):
+        query_stats = current_query_stats.get()
+        if query_stats is not None:
+            query_stats.record(elapsed, lambda: self._compile(query)[0])
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            route = query_stats.route if query_stats is not None else "-"
+            logger.warning("Slow query (%.1f ms) on %s: %s", elapsed * 1000, route, self._compile(query)[0])
+
+    async def fetch_all(self, query: ClauseElement):
+        return await self._timed(super().fetch_all, query)
+
+    async def fetch_one(self, query: ClauseElement):
+        # fetch_val goes through fetch_one, so it is counted here too
+        return await self._timed(super().fetch_one, query)
+
+    async def execute(self, query: ClauseElement):
+        return await self._timed(super().execute, query)
+
+    async def execute_many(self, queries: list[ClauseElement]):
+        for query in queries:
+            await self._timed(super().execute, query)
+
+
+class CachedCompilePostgresBackend(PostgresBackend):
+    """Reuses compiled SQL for statements of the same shape.
+
+    Statements are keyed by SQLAlchemy's cache key, so only the bound values are
+    extracted per call. The SQL text stays identical across calls, which also keeps
+    asyncpg's per-connection prepared statement cache warm. Like the connection
+    class it builds on databases internals, see CachedCompilePostgresConnection.
+    """
+
+    def __init__(self, database_url, compiled_cache_size: int = 0, **options):
+        super().__init__(database_url, **options)
+        self.compiled_cache = TTLCache(max_size=compiled_cache_size, ttl=COMPILED_QUERY_TTL)
+
+    def connection(self) -> InstrumentedPostgresConnection:
+        return InstrumentedPostgresConnection(self, self._dialect)
+
+
+class PooledDatabase(Database):
+    SUPPORTED_BACKENDS = {
+        **Database.SUPPORTED_BACKENDS,
+        "postgresql": "app.db:CachedCompilePostgresBackend",
+        "postgres": "app.db:CachedCompilePostgresBackend",
+    }
+
+    def __init__(self, url: str, *, acquire_timeout: float = None, **options):
+        super().__init__(url, **options)
+        self.acquire_timeout = acquire_timeout
+        self.pool_stats = PoolStats()
+
+    async def connect(self) -> None:
+        await super().connect()
+        # the backend keeps its asyncpg pool in the private _pool, pinned with databases in requirements.txt
+        pool = getattr(self._backend, "_pool", None)
+        if pool is not None and not isinstance(pool, InstrumentedPool):
+            self._backend._pool = InstrumentedPool(pool, self.pool_stats, self.acquire_timeout)
+
+    def stats(self) -> dict:
+        result = {"connected": self.is_connected}
+        pool = getattr(self._backend, "_pool", None)
+        if pool is not None:
+            size = pool.get_size()
+            idle = pool.get_idle_size()
+            result.update({
+                "size": size,
+                "in_use": size - idle,
+                "idle": idle,
+                "min_size": pool.get_min_size(),
+                "max_size": pool.get_max_size(),
+            })
+        result.update(self.pool_stats.stats())
+        compiled_cache = getattr(self._backend, "compiled_cache", None)
+        if compiled_cache is not None:
+            result["compiled_queries"] = compiled_cache.stats()
+        return result
+
+
+def create_database(url: str) -> PooledDatabase:
+    return PooledDatabase(
+        url,
+        acquire_timeout=settings.DB_POOL_ACQUIRE_TIMEOUT,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        compiled_cache_size=settings.DB_COMPILED_CACHE_SIZE,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        max_queries=settings.DB_CONNECTION_MAX_QUERIES,
+        max_inactive_connection_lifetime=settings.DB_CONNECTION_MAX_INACTIVE_LIFETIME,
+        server_settings={"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT)},
+    )
@@ -1,14 +1,21 @@
+import hashlib
 import os
+import re
+import time
+import uuid
 
-from fastapi import UploadFile, File, Depends, HTTPException, status
+from fastapi import UploadFile, File, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select, insert
+from sqlalchemy import select, insert, func
 import aiofiles
+from asyncpg.exceptions import UniqueViolationError
 from typing import Any
 
 from app.settings import settings
+from app.db import primary_written
+from app.metrics import upload_duration_seconds, upload_size_bytes
 from app.models import User
-from app.utils import verify_password, get_hashed_password
+from app.utils import verify_password_async, get_hashed_password_async, etag_matches
 from app.schemas.user import CreateUser
 
 def get_db():
@@ -16,6 +23,18 @@ def get_db():
     return database
 
 
+def get_replica_db():
+    from app.main import replica_database
+    return replica_database
+
+
+def get_read_db():
+    replica_database = get_replica_db()
+    if replica_database is None or primary_written.get():
+        return get_db()
+    return replica_database
+
+
 async def get_auth_user_or_404(form_data: OAuth2PasswordRequestForm = Depends()) -> User:
     database = get_db()
     query = select(User).where(User.username == form_data.username)
@@ -23,7 +42,7 @@ async def get_auth_user_or_404(form_data: OAuth2PasswordRequestForm = Depends())
     if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
     hashed_pass = user.password
-    if not verify_password(form_data.password, hashed_pass):
+    if not await verify_password_async(form_data.password, hashed_pass):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
 
     return user
@@ -31,25 +50,80 @@ async def get_auth_user_or_404(form_data: OAuth2PasswordRequestForm = Depends())
 
 async def create_admin(form_data: OAuth2PasswordRequestForm = Depends()):
     if form_data.username == "Guest" and form_data.password == "1234":
-        payload = CreateUser(name="admin", username="admin", password=get_hashed_password("admin"))
+        hashed_password = await get_hashed_password_async("admin")
+        payload = CreateUser(name="admin", username="admin", password=hashed_password)
         query = insert(User).values(**payload.dict())
         database = get_db()
-        await database.execute(query)
+        try:
+            await database.execute(query)
+        except UniqueViolationError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
     else:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
 
+def get_upload_extension(file_name: str | None) -> str:
+    extension = os.path.splitext(file_name or "")[1].lower()
+    return extension if re.fullmatch(r"\.[a-z0-9]{1,10}", extension) else ""
+
+
 def upload_file_with_directory(directory_name: str) -> Any:
     async def _upload_file(file: UploadFile = File(...)) -> str:
-        destination = os.path.join(destination_dir, file.filename)
-        async with aiofiles.open(destination, "wb") as out_file:
-            while content := await file.read(1024):
-                await out_file.write(content)
+        temp_path = os.path.join(destination_dir, f".{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        started = time.perf_counter()
+        try:
+            async with aiofiles.open(temp_path, "wb") as out_file:
+                while content := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    size += len(content)
+                    if size > settings.UPLOAD_MAX_SIZE:
+                        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                            detail="Uploaded file is too large")
+                    digest.update(content)
+                    await out_file.write(content)
 
-        return file.filename
+            # content-addressed names make identical uploads share one file
+            file_name = f"{digest.hexdigest()}{get_upload_extension(file.filename)}"
+            destination = os.path.join(destination_dir, file_name)
+            if os.path.exists(destination):
+                os.remove(temp_path)
+                # the existing file may be an old orphan, a fresh mtime keeps static_gc away until the row is saved
+                os.utime(destination)
+            else:
+                os.replace(temp_path, destination)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        upload_size_bytes.observe(directory_name, value=size)
+        upload_duration_seconds.observe(directory_name, value=time.perf_counter() - started)
+        return file_name
 
     destination_dir = os.path.join(settings.STATIC_FILES_DIR, directory_name)
     if not os.path.exists(destination_dir):
         os.makedirs(destination_dir)
 
     return _upload_file
+
+
+def conditional_get(*models) -> Any:
+    async def _conditional_get(request: Request, response: Response) -> str:
+        table_state = []
+        for model in models:
+            table_state.append(select(func.max(model.updatedAt)).scalar_subquery())
+            table_state.append(select(func.count()).select_from(model).scalar_subquery())
+        database = get_read_db()
+        state = await database.fetch_one(select(*table_state))
+
+        validator = repr((request.url.path, request.url.query, tuple(state.values())))
+        etag = '"{}"'.format(hashlib.sha256(validator.encode()).hexdigest()[:32])
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+        return etag
+
+    return _conditional_get
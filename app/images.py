@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.cache import TTLCache
+from app.settings import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional, without it uploads are served as they are
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+STATIC_URL_PREFIX = "/static/"
+
+# which derivatives exist on disk, by original path; short-lived so files made by other workers show up
+existing_derivatives = TTLCache(max_size=settings.STATIC_STAT_CACHE_SIZE, ttl=settings.STATIC_STAT_CACHE_TTL)
+
+
+def get_derivative_name(file_name: str, width: int, extension: str) -> str:
+    stem = os.path.splitext(file_name)[0]
+    return f"{stem}_w{width}.{extension}"
+
+
+def get_static_path(url: str) -> str | None:
+    if not url.startswith(STATIC_URL_PREFIX):
+        return None
+    return os.path.join(settings.STATIC_FILES_DIR, *url[len(STATIC_URL_PREFIX):].split("/"))
+
+
+def get_missing_derivatives(path: str) -> list[tuple[int, str]]:
+    directory, file_name = os.path.split(path)
+    return [
+        (width, extension)
+        for width in settings.IMAGE_DERIVATIVE_WIDTHS
+        for extension in DERIVATIVE_FORMATS
+        if not os.path.exists(os.path.join(directory, get_derivative_name(file_name, width, extension)))
+    ]
+
+
+def get_existing_derivatives(path: str) -> list[tuple[int, str]]:
+    derivatives = existing_derivatives.get(path)
+    if derivatives is None:
+        directory, file_name = os.path.split(path)
+        derivatives = [
+            (width, extension)
+            for width in settings.IMAGE_DERIVATIVE_WIDTHS
+            for extension in DERIVATIVE_FORMATS
+            if os.path.exists(os.path.join(directory, get_derivative_name(file_name, width, extension)))
+        ]
+        existing_derivatives.set(path, derivatives)
+    return derivatives
+
+
+def get_derivative_urls(url: str | None) -> list[dict]:
+    """Only derivatives already on disk are listed, the worker may not have made them yet or at all."""
+    path = get_static_path(url) if url else None
+    if path is None:
+        return []
+    directory, file_name = os.path.split(url)
+    return [
+        {"width": width, "format": extension, "url": f"{directory}/{get_derivative_name(file_name, width, extension)}"}
+        for width, extension in get_existing_derivatives(path)
+    ]
+
+
+def create_image_derivatives(path: str):
+    directory, file_name = os.path.split(path)
+    with Image.open(path) as original:
+        original = ImageOps.exif_transpose(original)
+        for width in settings.IMAGE_DERIVATIVE_WIDTHS:
+            resized = original.copy()
+            resized.thumbnail((width, width * 10))
+            for extension, image_format in DERIVATIVE_FORMATS.items():
+                destination = os.path.join(directory, get_derivative_name(file_name, width, extension))
+                if os.path.exists(destination):
+                    continue
+                image = resized.convert("RGB") if image_format == "JPEG" else resized
+                temp_path = f"{destination}.part"
+                image.save(temp_path, format=image_format, quality=settings.IMAGE_DERIVATIVE_QUALITY, optimize=True)
+                os.replace(temp_path, destination)
+
+
+class ImageDerivativeWorker:
+    """Background task that resizes uploaded images without holding up the upload request."""
+
+    def __init__(self, max_queue_size: int):
+        self.max_queue_size = max_queue_size
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if Image is None:
+            logger.warning("Pillow is not installed, image derivatives are disabled")
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def enqueue(self, path: str) -> bool:
+        """Returns False when the image is skipped, python -m app.commands.image_derivatives makes it later."""
+        if Image is None:
+            return False
+        if self._queue is None:
+            logger.warning("Image derivative worker is not running, skipping %s", path)
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(path)
+        except asyncio.QueueFull:
+            logger.warning("Image derivative queue is full, skipping %s", path)
+            self.dropped += 1
+            return False
+        return True
+
+    async def _run(self):
+        while True:
+            path = await self._queue.get()
+            try:
+                await run_in_threadpool(create_image_derivatives, path)
+                existing_derivatives.invalidate(path)
+                self.processed += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Could not create image derivatives for %s", path)
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+image_worker = ImageDerivativeWorker(max_queue_size=settings.IMAGE_DERIVATIVE_QUEUE_SIZE)
@@ -1,15 +1,23 @@
 from fastapi import FastAPI, Depends, Response, status
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine
-from databases import Database
 
-from app.routers import events, auth, users, reservations, menu_item
+from app.routers import events, auth, users, reservations, menu_item, internal, public, search
 from app.settings import settings
+from app.db import create_database
 from app.dependencies import create_admin
-
-
-engine = create_engine(settings.DB_URI)
+from app.images import image_worker
+from app.metrics import (
+    registry,
+    db_pool_acquired_total,
+    db_pool_connections,
+    db_pool_timeouts_total,
+    db_pool_wait_seconds_total,
+    db_pool_waiting,
+)
+from app.middleware import MetricsMiddleware, QueryStatsMiddleware, UploadSizeLimitMiddleware
+from app.service_layer.menu_items_service import load_menu_suggestions
+from app.static_files import CachedStaticFiles
 
 app = FastAPI()
 
@@ -27,28 +35,71 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(UploadSizeLimitMiddleware, max_body_size=settings.UPLOAD_MAX_SIZE)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(events.router)
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(reservations.router)
 app.include_router(menu_item.router)
+app.include_router(internal.router)
+app.include_router(public.router)
+app.include_router(search.router)
+
+app.mount(
+    "/static",
+    CachedStaticFiles(
+        directory=settings.STATIC_FILES_DIR,
+        stat_cache_size=settings.STATIC_STAT_CACHE_SIZE,
+        stat_cache_ttl=settings.STATIC_STAT_CACHE_TTL
+    ),
+    name="static"
+)
+
+database = create_database(settings.DB_URI)
+replica_database = create_database(settings.DB_REPLICA_URI) if settings.DB_REPLICA_URI else None
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-database = Database(settings.DB_URI)
+def collect_db_pool_metrics():
+    for name, pooled_database in (("primary", database), ("replica", replica_database)):
+        if pooled_database is None:
+            continue
+        stats = pooled_database.stats()
+        db_pool_connections.set(name, "in_use", value=stats.get("in_use", 0))
+        db_pool_connections.set(name, "idle", value=stats.get("idle", 0))
+        db_pool_waiting.set(name, value=stats["waiting"])
+        db_pool_acquired_total.set_total(name, value=stats["acquired"])
+        db_pool_wait_seconds_total.set_total(name, value=stats["wait_seconds_total"])
+        db_pool_timeouts_total.set_total(name, value=stats["timeouts"])
+
+
+registry.add_collector(collect_db_pool_metrics)
 
 
 @app.on_event("startup")
 async def startup():
     await database.connect()
+    if replica_database is not None:
+        await replica_database.connect()
+    await load_menu_suggestions()
+    image_worker.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    await image_worker.stop()
+    if replica_database is not None:
+        await replica_database.disconnect()
     await database.disconnect()
 
 
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get('/create-user')
 async def create_user(admin = Depends(create_admin)):
     return Response(status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,148 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+Metrics are only updated from the event loop, so plain integer and float
+updates are enough and no locks are taken on the request path. Histograms
+keep one counter per bucket and find it with a binary search.
+"""
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024)
+
+
+def format_labels(label_names: tuple, label_values: tuple, extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(label_names, label_values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for label_values, value in self._values.items():
+            lines.append(f"{self.name}{format_labels(self.label_names, label_values)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def set_total(self, *label_values, value: float):
+        """Mirror a running total that is already counted elsewhere."""
+        self._values[label_values] = value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, *label_values, value: float):
+        self._values[label_values] = value
+
+    def inc(self, *label_values, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *label_values, value: float):
+        series = self._values.get(label_values)
+        if series is None:
+            # one slot per bucket plus +Inf, then the sum
+            series = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for label_values, series in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                labels = format_labels(self.label_names, label_values, f'le="{format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+        self.collectors: list[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Collectors run before rendering, to copy values that are cheaper to read on demand."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served.", ("method",)))
+
+db_pool_connections = registry.register(Gauge(
+    "db_pool_connections", "Database pool connections by state.", ("database", "state")))
+db_pool_waiting = registry.register(Gauge(
+    "db_pool_waiting", "Requests waiting for a database connection.", ("database",)))
+db_pool_acquired_total = registry.register(Counter(
+    "db_pool_acquired_total", "Database connections checked out of the pool.", ("database",)))
+db_pool_wait_seconds_total = registry.register(Counter(
+    "db_pool_wait_seconds_total", "Time spent waiting for a database connection.", ("database",)))
+db_pool_timeouts_total = registry.register(Counter(
+    "db_pool_timeouts_total", "Database connection checkouts that timed out.", ("database",)))
+
+upload_size_bytes = registry.register(Histogram(
+    "upload_size_bytes", "Size of uploaded files.", ("directory",), buckets=SIZE_BUCKETS))
+upload_duration_seconds = registry.register(Histogram(
+    "upload_duration_seconds", "Time spent receiving and storing uploaded files.", ("directory",)))
+
+auth_failures_total = registry.register(Counter(
+    "auth_failures_total", "Rejected access tokens by reason.", ("reason",)))
@@ -0,0 +1,147 @@
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db import QueryStats, current_query_stats
+from app.metrics import http_request_duration_seconds, http_requests_in_progress, http_requests_total
+
+logger = logging.getLogger(__name__)
+
+# room for multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """Rejects upload requests with 413 as soon as their body passes max_body_size.
+
+    Starlette spools the whole multipart body before the route runs, so the
+    limit has to be enforced while the body is still being received.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int, path_suffix: str = "/upload-image"):
+        self.app = app
+        self.max_body_size = max_body_size + MULTIPART_OVERHEAD
+        self.path_suffix = path_suffix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].rstrip("/").endswith(self.path_suffix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self.too_large(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    exceeded = True
+                    raise BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message):
+            nonlocal response_started
+            # the body parser turns BodyTooLarge into its own error response; drop it
+            if exceeded and not response_started:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except BodyTooLarge:
+            pass
+        if exceeded and not response_started:
+            await self.too_large(scope, receive, send)
+
+    async def too_large(self, scope: Scope, receive: Receive, send: Send):
+        response = JSONResponse({"detail": "Uploaded file is too large"}, status_code=413)
+        await response(scope, receive, send)
+
+
+class QueryStatsMiddleware:
+    """Collects database stats for each request and reports them in a Server-Timing header."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        query_stats = QueryStats(scope["method"], scope["path"], scope)
+        token = current_query_stats.set(query_stats)
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", query_stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            if query_stats.count:
+                logger.debug("%s: %d queries in %.1f ms, slowest %.1f ms: %s", query_stats.route, query_stats.count,
+                             query_stats.total_time * 1000, query_stats.slowest_time * 1000,
+                             query_stats.slowest_statement)
+
+
+class MetricsMiddleware:
+    """Records request counts, latency and in-flight requests per route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec(method)
+            route = self.get_route_label(scope, root_path)
+            http_request_duration_seconds.observe(method, route, value=time.perf_counter() - started)
+            http_requests_total.inc(method, route, status_code)
+
+    @staticmethod
+    def get_route_label(scope: Scope, root_path: str) -> str:
+        # raw paths would give every id its own series, so only templates are used as labels
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        if scope.get("root_path", "") != root_path:
+            return scope["root_path"][len(root_path):]
+        return "unmatched"
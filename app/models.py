@@ -1,6 +1,8 @@
 import enum
 
-from sqlalchemy import TIMESTAMP, Column, String, Boolean, Integer, Enum
+from sqlalchemy import TIMESTAMP, Column, String, Boolean, Integer, Enum, Index, Date, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -8,6 +10,11 @@ from app.database import Base
 
 class User(Base):
     __tablename__ = "auth_user"
+    __table_args__ = (
+        Index("ix_auth_user_username", "username", unique=True),
+        Index("ix_auth_user_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_auth_user_search_vector", "search_vector", postgresql_using="gin"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(length=266), nullable=True)
     username = Column(String(length=255), nullable=False)
@@ -15,10 +22,20 @@ class User(Base):
     avatar = Column(String(length=1024), nullable=True)
     createdAt = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
     updatedAt = Column(TIMESTAMP(timezone=True), default=None, server_default=func.now())
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(username, '')), 'A')",
+        persisted=True
+    )))
 
 
 class Events(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_events_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_events_updated_at", "updatedAt"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(length=255), nullable=False)
     description = Column(String(length=1024), nullable=True)
@@ -26,10 +43,21 @@ class Events(Base):
     createdAt = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
     updatedAt = Column(TIMESTAMP(timezone=True), default=None, server_default=func.now())
     image = Column(String(length=1024), nullable=True)
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+        persisted=True
+    )))
 
 
 class Reservations(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        Index("ix_reservations_date_reservation_id", "date_reservation", "id"),
+        Index("ix_reservations_date_reservation_served", "date_reservation", "served"),
+        Index("ix_reservations_people_count_id", "people_count", "id"),
+        Index("ix_reservations_updated_at", "updatedAt"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     date_reservation = Column(TIMESTAMP(timezone=True), nullable=False)
     people_count = Column(Integer, nullable=False)
@@ -42,6 +70,15 @@ class Reservations(Base):
     updatedAt = Column(TIMESTAMP(timezone=True), default=None, server_default=func.now())
 
 
+# Maintained by the reservations_daily_stats trigger, see migration 27de303f0a62
+class ReservationDailyStat(Base):
+    __tablename__ = "reservation_daily_stats"
+    day = Column(Date, primary_key=True)
+    people_count = Column(Integer, primary_key=True)
+    served = Column(Boolean, primary_key=True)
+    reservations_count = Column(Integer, nullable=False, server_default="0")
+
+
 class MenuCategory(enum.Enum):
     ALCOHOL_DRINKS = 'alcohol_drinks'
     NON_ALCOHOL_DRINKS = 'non_alcohol_drinks'
@@ -52,6 +89,12 @@ class MenuCategory(enum.Enum):
 
 class MenuItem(Base):
     __tablename__ = "menu_item"
+    __table_args__ = (
+        Index("ix_menu_item_category", "category"),
+        Index("ix_menu_item_sub_category", "sub_category"),
+        Index("ix_menu_item_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_menu_item_updated_at", "updatedAt"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     category = Column(Enum(MenuCategory, values_callable=lambda obj: [e.value for e in obj]))
     sub_category = Column(String(length=1024))
@@ -64,3 +107,9 @@ class MenuItem(Base):
     special = Column(Boolean, nullable=False, server_default="False")
     createdAt = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
     updatedAt = Column(TIMESTAMP(timezone=True), default=None, server_default=func.now())
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(sub_name, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(sub_category, '')), 'C')",
+        persisted=True
+    )))
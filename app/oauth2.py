@@ -1,4 +1,5 @@
 import base64
+import time
 from typing import Union, Any
 from datetime import datetime, timedelta
 import jwt
@@ -6,6 +7,8 @@ from fastapi import HTTPException, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 
+from app.cache import TTLCache
+from app.metrics import auth_failures_total
 from app.models import User
 from app.settings import settings
 from app.dependencies import get_db
@@ -13,6 +16,9 @@ from app.dependencies import get_db
 JWT_PUBLIC_KEY: str = base64.b64decode(settings.JWT_PUBLIC_KEY).decode('utf-8')
 JWT_PRIVATE_KEY: str = base64.b64decode(settings.JWT_PRIVATE_KEY).decode('utf-8')
 
+token_cache = TTLCache(max_size=settings.AUTH_CACHE_MAX_SIZE, ttl=settings.AUTH_CACHE_TTL)
+auth_user_cache = TTLCache(max_size=settings.AUTH_CACHE_MAX_SIZE, ttl=settings.AUTH_CACHE_TTL)
+
 
 def create_access_token(subject: Union[str, Any], expires_delta: int = None) -> str:
     if expires_delta is not None:
@@ -37,14 +43,21 @@ def create_refresh_token(subject: Union[str, Any], expires_delta: int = None) ->
 
 
 def decode_token(token):
+    subject = token_cache.get(token)
+    if subject is not None:
+        return subject
     try:
         payload = jwt.decode(token, JWT_PUBLIC_KEY, settings.JWT_ALGORITHM)
         if payload['type'] == 'access':
+            token_cache.set(token, payload['subject'], ttl=payload['exp'] - time.time())
             return payload['subject']
+        auth_failures_total.inc("invalid_scope")
         raise HTTPException(status_code=401, detail='Scope for the token is invalid')
     except jwt.ExpiredSignatureError:
+        auth_failures_total.inc("expired")
         raise HTTPException(status_code=401, detail='Token expired')
     except jwt.InvalidTokenError:
+        auth_failures_total.inc("invalid")
         raise HTTPException(status_code=401, detail='Invalid token')
 
 
@@ -63,10 +76,14 @@ def refresh_auth_token(refresh_token):
 
 
 async def get_auth_user_by_token(credentials: HTTPAuthorizationCredentials = Security(HTTPBearer())):
-    user_id = decode_token(credentials.credentials)
+    user_id = int(decode_token(credentials.credentials))
+    user = auth_user_cache.get(user_id)
+    if user is not None:
+        return user
     database = get_db()
-    query = select(User.id, User.username, User.avatar).where(User.id == int(user_id))
+    query = select(User.id, User.username, User.avatar).where(User.id == user_id)
     user = await database.fetch_one(query)
     if not user:
         raise HTTPException(status_code=401, detail='Invalid credentials')
+    auth_user_cache.set(user_id, user)
     return user
@@ -0,0 +1,82 @@
+import re
+import time
+from bisect import bisect_left, insort
+from typing import Any, Hashable, Iterable
+
+WORD_BOUNDARY = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return WORD_BOUNDARY.sub(" ", text.casefold()).strip()
+
+
+class PrefixIndex:
+    """Sorted (key, id) pairs searched with bisect for prefix completion.
+
+    Every text is indexed from its start and from the start of each later
+    word, so "marg" and "pizza" both find "Margherita pizza". Meant to be
+    used from the event loop only, so no locking is done.
+    """
+
+    def __init__(self):
+        self._entries: list[tuple[str, Any]] = []
+        self._keys_by_id: dict[Hashable, list[str]] = {}
+        self._values: dict[Hashable, Any] = {}
+        self.built_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def get_keys(texts: Iterable[str | None]) -> list[str]:
+        keys = set()
+        for text in texts:
+            words = normalize(text or "").split(" ")
+            for position in range(len(words)):
+                key = " ".join(words[position:])
+                if key:
+                    keys.add(key)
+        return sorted(keys)
+
+    def rebuild(self, items: Iterable[tuple[Hashable, Iterable[str | None], Any]]):
+        entries, keys_by_id, values = [], {}, {}
+        for item_id, texts, value in items:
+            keys = self.get_keys(texts)
+            keys_by_id[item_id] = keys
+            values[item_id] = value
+            entries.extend((key, item_id) for key in keys)
+        entries.sort()
+        self._entries, self._keys_by_id, self._values = entries, keys_by_id, values
+        self.built_at = time.monotonic()
+
+    def add(self, item_id: Hashable, texts: Iterable[str | None], value: Any):
+        self.remove(item_id)
+        keys = self.get_keys(texts)
+        for key in keys:
+            insort(self._entries, (key, item_id))
+        self._keys_by_id[item_id] = keys
+        self._values[item_id] = value
+
+    def remove(self, item_id: Hashable):
+        for key in self._keys_by_id.pop(item_id, []):
+            position = bisect_left(self._entries, (key, item_id))
+            if position < len(self._entries) and self._entries[position] == (key, item_id):
+                del self._entries[position]
+        self._values.pop(item_id, None)
+
+    def search(self, prefix: str, limit: int = 10) -> list[Any]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        entries = self._entries
+        found, results = set(), []
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and len(results) < limit:
+            key, item_id = entries[position]
+            if not key.startswith(prefix):
+                break
+            if item_id not in found:
+                found.add(item_id)
+                results.append(self._values[item_id])
+            position += 1
+        return results
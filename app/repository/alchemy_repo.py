@@ -1,8 +1,23 @@
 from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple
 
 from abc import ABC, abstractmethod
-from sqlalchemy import select, func, insert, update, delete
-from app.dependencies import get_db
+from sqlalchemy import select, func, insert, update, delete, inspect
+from sqlalchemy.sql import Select
+from app.db import mark_primary_written
+from app.dependencies import get_db, get_read_db
+
+
+class Page(NamedTuple):
+    items: list
+    total: int
+
+
+@lru_cache
+def get_loaded_columns(model) -> list:
+    """Columns select(model) loads, deferred ones such as search_vector are left out of RETURNING too."""
+    return [column for attr in inspect(model).column_attrs if not attr.deferred for column in attr.columns]
 
 
 class AbstractSimpleCrud(ABC):
@@ -34,33 +49,67 @@ class SQLAlchemySimpleCRUDRepository(AbstractSimpleCrud):
     def __init__(self):
         self.database = get_db()
 
+    @property
+    def read_database(self):
+        return get_read_db()
+
     async def get_list(self, limit: int = 10, page: int = 1):
         skip = (page - 1) * limit
         query = select(self.model).limit(limit).offset(skip)
-        instances = await self.database.fetch_all(query=query)
+        instances = await self.read_database.fetch_all(query=query)
         return instances
 
     async def get_count_of_list(self):
         query_count = select(func.count()).select_from(select(self.model))
-        count = await self.database.fetch_val(query_count)
+        count = await self.read_database.fetch_val(query_count)
         return count
 
+    async def get_page_with_count(self, query: Select, limit: int = 10, page: int = 1) -> Page:
+        skip = (page - 1) * limit
+        page_query = query.add_columns(func.count().over().label("total_count")).limit(limit).offset(skip)
+        instances = await self.read_database.fetch_all(query=page_query)
+        if instances:
+            return Page(items=instances, total=instances[0].total_count)
+        if skip:
+            # the window total is lost when the requested page is past the end
+            total = await self.read_database.fetch_val(select(func.count()).select_from(query.subquery()))
+            return Page(items=instances, total=total or 0)
+        return Page(items=instances, total=0)
+
+    async def get_list_with_count(self, limit: int = 10, page: int = 1) -> Page:
+        return await self.get_page_with_count(select(self.model), limit=limit, page=page)
+
     async def get_instance(self, instance_id: int):
         query = select(self.model).where(self.model.id == instance_id)
         instance = await self.database.fetch_one(query)
         return instance
 
     async def create_instance(self, data: dict):
-        query = insert(self.model).values(**data)
-        instance_id = await self.database.execute(query=query)
-        return instance_id
+        mark_primary_written()
+        query = insert(self.model).values(**data).returning(*get_loaded_columns(self.model))
+        instance = await self.database.fetch_one(query=query)
+        return instance
+
+    async def create_instances(self, data: list[dict]) -> int:
+        if not data:
+            return 0
+        mark_primary_written()
+        query = insert(self.model).values(data)
+        await self.database.execute(query=query)
+        return len(data)
 
     async def update_instance(self, instance_id, data: dict):
-        update_query = update(self.model).where(self.model.id == instance_id).values(updatedAt=datetime.now(), **data)
-        await self.database.execute(update_query)
-        updated_instance = await self.database.fetch_one(select(self.model).where(self.model.id == instance_id))
+        mark_primary_written()
+        update_query = update(self.model).where(self.model.id == instance_id).values(
+            updatedAt=datetime.now(), **data
+        ).returning(*get_loaded_columns(self.model))
+        updated_instance = await self.database.fetch_one(update_query)
         return updated_instance
 
     async def delete_instance(self, instance_id):
-        delete_query = delete(self.model).where(self.model.id == instance_id)
-        await self.database.execute(delete_query)
+        mark_primary_written()
+        delete_query = delete(self.model).where(
+            self.model.id == instance_id
+        ).returning(*get_loaded_columns(self.model))
+        deleted_instance = await self.database.fetch_one(delete_query)
+        return deleted_instance
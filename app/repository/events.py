@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.sql import Select
+
+from app.db import mark_primary_written
+from app.repository.alchemy_repo import SQLAlchemySimpleCRUDRepository, Page
+from app.models import Events
+
+
+class EventsRepository(SQLAlchemySimpleCRUDRepository):
+    model = Events
+
+    def get_filtered_query(self, search: str = "") -> Select:
+        query = select(self.model)
+        if search:
+            query = query.where(self.model.name.ilike(f"%{search}%"))
+        return query
+
+    async def get_list_with_count(self, limit: int = 10, page: int = 1, search: str = "") -> Page:
+        return await self.get_page_with_count(self.get_filtered_query(search), limit=limit, page=page)
+
+    async def get_published(self, limit: int):
+        query = select(self.model).where(self.model.published == True).order_by(
+            self.model.createdAt.desc(), self.model.id.desc()
+        ).limit(limit)
+        # the feed snapshot is cached until the next write, so it is built from the primary
+        events = await self.database.fetch_all(query=query)
+        return events
+
+    async def update_image_for_event(self, event_id: int, image_name: str):
+        mark_primary_written()
+        update_query = update(self.model).where(self.model.id == event_id).values(
+            image=f'/static/events/{image_name}',
+            updatedAt=datetime.now()
+        ).returning(self.model.id)
+        return await self.database.fetch_one(update_query)
+
+
+def events_repository_factory():
+    return EventsRepository()
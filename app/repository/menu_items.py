@@ -2,14 +2,23 @@ from typing import List
 
 from sqlalchemy import select, func, or_
 from sqlalchemy.dialects.postgresql import array_agg
+from sqlalchemy.sql import Select
 
-from app.repository.alchemy_repo import SQLAlchemySimpleCRUDRepository
+from app.repository.alchemy_repo import SQLAlchemySimpleCRUDRepository, Page
 from app.models import MenuItem
 
 
 class MenuItemRepository(SQLAlchemySimpleCRUDRepository):
     model = MenuItem
 
+    def get_filtered_query(self, category: List[str] = [], sub_category: List[str] = []) -> Select:
+        query = select(self.model)
+        conditions = [self.model.category == cat for cat in category]
+        conditions += [self.model.sub_category == sub_cat for sub_cat in sub_category]
+        if conditions:
+            query = query.where(or_(*conditions))
+        return query
+
     async def get_list(self,
                        limit: int = 10,
                        page: int = 1,
@@ -17,14 +26,11 @@ class MenuItemRepository(SQLAlchemySimpleCRUDRepository):
                        sub_category: List[str] = []
                        ):
 
-        query = select(self.model).where(or_(
-            or_(self.model.category == cat for cat in category),
-            or_(self.model.sub_category == sub_cat for sub_cat in sub_category)
-        ))
+        query = self.get_filtered_query(category, sub_category)
         skip = (page - 1) * limit
         query = query.limit(limit).offset(skip)
 
-        reservations = await self.database.fetch_all(query=query)
+        reservations = await self.read_database.fetch_all(query=query)
         return reservations
 
     async def get_count_of_list(self,
@@ -33,18 +39,40 @@ class MenuItemRepository(SQLAlchemySimpleCRUDRepository):
         count_query = select(
             func.count()
         ).select_from(
-            select(self.model).where(or_(
-                or_(self.model.category == cat for cat in category),
-                or_(self.model.sub_category == sub_cat for sub_cat in sub_category)
-            )))
-        result_count = await self.database.fetch_val(count_query) or 0
+            self.get_filtered_query(category, sub_category)
+        )
+        result_count = await self.read_database.fetch_val(count_query) or 0
         return result_count
 
+    async def get_list_with_count(self,
+                                  limit: int = 10,
+                                  page: int = 1,
+                                  category: List[str] = [],
+                                  sub_category: List[str] = []
+                                  ) -> Page:
+        query = self.get_filtered_query(category, sub_category)
+        return await self.get_page_with_count(query, limit=limit, page=page)
+
+    async def get_menu(self):
+        # snapshots are cached until the next write, so never build one from a lagging replica
+        # items without a category cannot be listed under one, and None is the key of the full menu document
+        query = select(self.model).where(self.model.category.isnot(None)).order_by(
+            self.model.category, self.model.sub_category, self.model.name, self.model.id)
+        menu_items = await self.database.fetch_all(query=query)
+        return menu_items
+
+    async def get_suggestion_rows(self):
+        query = select(
+            self.model.id, self.model.name, self.model.sub_name, self.model.category, self.model.sub_category
+        )
+        rows = await self.read_database.fetch_all(query=query)
+        return rows
+
     async def get_category_with_subcategory(self):
         filter_query = select(
             self.model.category, array_agg(func.distinct(self.model.sub_category)).label("sub_categories")
         ).group_by(self.model.category)
-        result = await self.database.fetch_all(filter_query)
+        result = await self.read_database.fetch_all(filter_query)
         return result
 
 
@@ -1,90 +1,189 @@
 from datetime import datetime
+from typing import Iterable
 
-from sqlalchemy import select, func, case, cast, Integer
+from sqlalchemy import select, func, case, cast, insert, delete, text, tuple_, Date
+from sqlalchemy.sql import Select
 
-from app.repository.alchemy_repo import SQLAlchemySimpleCRUDRepository
-from app.models import Reservations
+from app.repository.alchemy_repo import SQLAlchemySimpleCRUDRepository, Page
+from app.models import Reservations, ReservationDailyStat
 
+# first key of the two-int pg_advisory_xact_lock, the second one is the slot number
+RESERVATION_SLOT_LOCK = 7351
 
-def get_order(order: str):
-    order_map = {
-        "date_desc": Reservations.date_reservation.desc(),
-        "date_asc": Reservations.date_reservation.asc(),
-        "people_desc": Reservations.people_count.desc(),
-        "people_asc": Reservations.people_count.asc(),
+
+def get_seek_columns(order: str | None) -> tuple[list, bool]:
+    seek_map = {
+        "date_desc": ([Reservations.date_reservation, Reservations.id], True),
+        "date_asc": ([Reservations.date_reservation, Reservations.id], False),
+        "people_desc": ([Reservations.people_count, Reservations.id], True),
+        "people_asc": ([Reservations.people_count, Reservations.id], False),
     }
-    return order_map.get(order)
+    return seek_map.get(order, ([Reservations.id], False))
 
 
 class ReservationRepository(SQLAlchemySimpleCRUDRepository):
     model = Reservations
 
+    def filter_by_date(self, query: Select, date_from: datetime | None = None, date_to: datetime | None = None):
+        if date_from:
+            query = query.where(self.model.date_reservation >= date_from)
+        if date_to:
+            query = query.where(self.model.date_reservation <= date_to)
+        return query
+
+    def get_ordered_query(self,
+                          date_from: datetime | None = None,
+                          date_to: datetime | None = None,
+                          order: str | None = None,
+                          after: list | None = None) -> Select:
+        seek_columns, descending = get_seek_columns(order)
+        query = select(self.model).order_by(
+            *(column.desc() if descending else column.asc() for column in seek_columns)
+        )
+        if after is not None:
+            seek_key, seek_values = tuple_(*seek_columns), tuple_(*after)
+            query = query.where(seek_key < seek_values if descending else seek_key > seek_values)
+        return self.filter_by_date(query, date_from, date_to)
+
     async def get_list(self,
                  limit: int = 10,
                  page: int = 1,
                  date_from: datetime | None = None,
                  date_to: datetime | None = None,
-                 order: str | None = None
+                 order: str | None = None,
+                 after: list | None = None
 ) -> list:
-        skip = (page - 1) * limit
-        query = select(self.model).limit(limit).offset(skip)
-        order_rule = get_order(order)
-        if order_rule is not None:
-            query = query.order_by(order_rule)
-        if date_from:
-            query = query.where(self.model.date_reservation >= date_from)
-        if date_to:
-            query = query.where(self.model.date_reservation <= date_to)
-        reservations = await self.database.fetch_all(query=query)
+        query = self.get_ordered_query(date_from, date_to, order, after).limit(limit)
+        if after is None:
+            skip = (page - 1) * limit
+            query = query.offset(skip)
+        reservations = await self.read_database.fetch_all(query=query)
 
         return reservations
 
+    async def get_list_with_count(self,
+                                  limit: int = 10,
+                                  page: int = 1,
+                                  date_from: datetime | None = None,
+                                  date_to: datetime | None = None,
+                                  order: str | None = None,
+                                  after: list | None = None
+) -> Page:
+        if after is None:
+            query = self.get_ordered_query(date_from, date_to, order)
+            return await self.get_page_with_count(query, limit=limit, page=page)
+
+        # the seek predicate hides earlier rows from count(*) over (), so the total is counted apart
+        reservations = await self.get_list(
+            limit=limit, date_from=date_from, date_to=date_to, order=order, after=after)
+        result_count = await self.get_count_of_list(date_from=date_from, date_to=date_to)
+        return Page(items=reservations, total=result_count)
+
+    def get_cursor_values(self, reservation, order: str | None = None) -> list:
+        seek_columns, _ = get_seek_columns(order)
+        return [reservation[column.name] for column in seek_columns]
+
+    def parse_cursor_values(self, values: list, order: str | None = None) -> list:
+        seek_columns, _ = get_seek_columns(order)
+        if len(values) != len(seek_columns):
+            raise ValueError("Cursor does not match the requested order")
+        parsed = []
+        for column, value in zip(seek_columns, values):
+            if column.type.python_type is datetime:
+                parsed.append(datetime.fromisoformat(value))
+            else:
+                parsed.append(int(value))
+        return parsed
+
     async def get_count_of_list(self,
                           date_from: datetime | None = None,
                           date_to: datetime | None = None,
 ) -> int:
-        count_query = select(Reservations)
-        if date_from:
-            count_query = count_query.where(self.model.date_reservation >= date_from)
-        if date_to:
-            count_query = count_query.where(self.model.date_reservation <= date_to)
+        count_query = self.filter_by_date(select(self.model), date_from, date_to)
         all_reservations_query = select(func.count()).select_from(count_query)
-        result_count = await self.database.fetch_val(all_reservations_query) or 0
+        result_count = await self.read_database.fetch_val(all_reservations_query) or 0
         return result_count
 
-    async def get_reservations_count_for_period(self, start_range: datetime, end_range: datetime):
-        day_date = func.date_trunc("day", self.model.date_reservation).label("day_date")
+    async def get_instance_for_update(self, instance_id: int):
+        query = select(self.model).where(self.model.id == instance_id).with_for_update()
+        instance = await self.database.fetch_one(query)
+        return instance
+
+    async def lock_slots(self, slot_numbers: Iterable[int]):
+        # always taken in ascending order, so two writers cannot wait on each other
+        for slot_number in sorted(set(slot_numbers)):
+            await self.database.execute(select(func.pg_advisory_xact_lock(RESERVATION_SLOT_LOCK, slot_number)))
+
+    async def get_reservations_starting_between(self,
+                                                range_start: datetime,
+                                                range_end: datetime,
+                                                exclude_id: int | None = None,
+                                                primary: bool = False):
+        query = select(
+            self.model.id, self.model.date_reservation, self.model.people_count
+        ).where(
+            self.model.date_reservation >= range_start,
+            self.model.date_reservation < range_end
+        ).order_by(self.model.date_reservation)
+        if exclude_id is not None:
+            query = query.where(self.model.id != exclude_id)
+        # capacity checks before a write must not see a lagging replica
+        database = self.database if primary else self.read_database
+        reservations = await database.fetch_all(query=query)
+        return reservations
 
+    async def get_reservations_count_for_period(self, start_range: datetime, end_range: datetime):
+        stat = ReservationDailyStat
         count_query = select(
-            day_date,
-            func.count(self.model.id).label("reserved_count"),
-            func.sum(case((self.model.served == True, cast(1, Integer)), else_=cast(0, Integer))).label(
-                "served_count")
+            stat.day.label("day_date"),
+            func.sum(stat.reservations_count).label("reserved_count"),
+            func.sum(case((stat.served == True, stat.reservations_count), else_=0)).label("served_count")
+        ).where(
+            stat.day.between(start_range.date(), end_range.date())
         ).group_by(
-            "day_date"
+            stat.day
         ).having(
-            day_date.between(start_range, end_range)
-        ).order_by("day_date")
+            func.sum(stat.reservations_count) > 0
+        ).order_by(stat.day)
 
-        reservations = await self.database.fetch_all(count_query)
+        reservations = await self.read_database.fetch_all(count_query)
         return reservations
 
     async def get_people_count_tables_for_period(self, start_range: datetime, end_range: datetime):
+        stat = ReservationDailyStat
         people_count = select(
-            self.model.people_count,
-            func.count(self.model.id).label("reservations_count")
-        ).group_by(
-            self.model.people_count
+            stat.people_count,
+            func.sum(stat.reservations_count).label("reservations_count")
         ).where(
-            self.model.date_reservation.between(start_range, end_range)
+            stat.day.between(start_range.date(), end_range.date())
+        ).group_by(
+            stat.people_count
+        ).having(
+            func.sum(stat.reservations_count) > 0
         ).order_by(
-            self.model.people_count
+            stat.people_count
         )
 
-        reservations = await self.database.fetch_all(people_count)
+        reservations = await self.read_database.fetch_all(people_count)
 
         return reservations
 
+    async def rebuild_daily_stats(self) -> int:
+        stat = ReservationDailyStat
+        day = cast(func.date_trunc("day", self.model.date_reservation), Date)
+        rollup_query = select(
+            day, self.model.people_count, self.model.served, func.count()
+        ).group_by(day, self.model.people_count, self.model.served)
+
+        async with self.database.transaction():
+            # SHARE mode blocks reservation writes, so the trigger cannot race the rebuild
+            await self.database.execute(text("LOCK TABLE reservations IN SHARE MODE"))
+            await self.database.execute(delete(stat))
+            await self.database.execute(insert(stat).from_select(
+                [stat.day, stat.people_count, stat.served, stat.reservations_count], rollup_query))
+            days_count = await self.database.fetch_val(select(func.count(func.distinct(stat.day))))
+        return days_count
+
 
 def reservations_repo_factory():
     return ReservationRepository()
@@ -0,0 +1,40 @@
+from sqlalchemy import select, func, literal, union_all, String
+
+from app.dependencies import get_read_db
+from app.models import Events, MenuItem, User
+
+
+class SearchRepository:
+    sources = {
+        "event": (Events, Events.name, Events.description),
+        "menu_item": (MenuItem, MenuItem.name, MenuItem.sub_category),
+        "user": (User, func.coalesce(User.name, User.username), User.username),
+    }
+
+    @property
+    def read_database(self):
+        return get_read_db()
+
+    async def search(self, term: str, types: list[str], limit: int = 20):
+        ts_query = func.websearch_to_tsquery("simple", term)
+        source_queries = []
+        for result_type in types or self.sources:
+            model, title, subtitle = self.sources[result_type]
+            rank = func.ts_rank(model.search_vector, ts_query)
+            # every source is ranked and cut to the limit through its own GIN index before merging
+            source_queries.append(
+                select(
+                    literal(result_type, String).label("type"),
+                    model.id.label("id"),
+                    title.label("title"),
+                    subtitle.label("subtitle"),
+                    rank.label("rank"),
+                ).where(model.search_vector.op("@@")(ts_query)).order_by(rank.desc()).limit(limit)
+            )
+        results = union_all(*source_queries).subquery()
+        query = select(results).order_by(results.c.rank.desc(), results.c.type, results.c.id).limit(limit)
+        return await self.read_database.fetch_all(query)
+
+
+def search_repository_factory():
+    return SearchRepository()
@@ -1,34 +1,48 @@
 from datetime import datetime
 
 from sqlalchemy import select, func, update
+from sqlalchemy.sql import Select
 
-from app.repository.alchemy_repo import SQLAlchemySimpleCRUDRepository
+from app.db import mark_primary_written
+from app.repository.alchemy_repo import SQLAlchemySimpleCRUDRepository, Page
 from app.models import User
 
 
 class UsersRepository(SQLAlchemySimpleCRUDRepository):
     model = User
 
+    def get_filtered_query(self, search: str = "") -> Select:
+        query = select(self.model)
+        if search:
+            query = query.where(self.model.name.ilike(f"%{search}%"))
+        return query
+
     async def get_list(self, limit: int = 10, page: int = 1, search=""):
         skip = (page - 1) * limit
-        if search:
-            query = select(self.model).where(self.model.name.ilike(f"%{search}%")).limit(limit).offset(skip)
-        else:
-            query = select(self.model).limit(limit).offset(skip)
-        users = await self.database.fetch_all(query=query)
+        query = self.get_filtered_query(search).limit(limit).offset(skip)
+        users = await self.read_database.fetch_all(query=query)
         return users
 
+    async def get_list_with_count(self, limit: int = 10, page: int = 1, search: str = "") -> Page:
+        return await self.get_page_with_count(self.get_filtered_query(search), limit=limit, page=page)
+
     async def get_count_of_list(self):
         query_count = select(func.count()).select_from(select(self.model))
-        count = await self.database.fetch_val(query_count)
+        count = await self.read_database.fetch_val(query_count)
         return count
 
+    async def is_avatar_used(self, avatar: str) -> bool:
+        query = select(func.count()).select_from(self.model).where(self.model.avatar == avatar)
+        count = await self.database.fetch_val(query)
+        return bool(count)
+
     async def update_avatar_for_user(self, user_id: int, avatar_name: str):
+        mark_primary_written()
         update_query = update(self.model).where(self.model.id == user_id).values(
             avatar=f'/static/users/{avatar_name}',
             updatedAt=datetime.now()
-        )
-        await self.database.execute(update_query)
+        ).returning(self.model.id)
+        return await self.database.fetch_one(update_query)
 
 
 def user_repository_factory():
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+
+from app.dependencies import get_db, get_replica_db
+from app.images import image_worker
+from app.oauth2 import auth_user_cache, get_auth_user_by_token, token_cache
+from app.utils import password_hash_pool
+
+router = APIRouter(
+    prefix="/api/internal",
+    tags=["internal"],
+    dependencies=[Depends(get_auth_user_by_token)]
+)
+
+
+@router.get("/stats")
+async def get_internal_stats():
+    replica_database = get_replica_db()
+    return {
+        "auth_cache": {
+            "tokens": token_cache.stats(),
+            "users": auth_user_cache.stats(),
+        },
+        "password_hash_pool": password_hash_pool.stats(),
+        "image_derivatives": image_worker.stats(),
+        "db_pool": get_db().stats(),
+        "db_replica_pool": replica_database.stats() if replica_database is not None else None,
+    }
@@ -9,16 +9,19 @@ from app.schemas.menu_item import (
     MenuItemUpdateSchema,
     MenuItemResponseSchema,
     ListMenuItemResponse,
-    MenuItemFilterResponse
+    MenuItemFilterResponse,
+    MenuItemSuggestion,
+    MenuItemSuggestResponse
 )
+from app.dependencies import conditional_get
 from app.oauth2 import get_auth_user_by_token
 from app.service_layer.menu_items_service import (
     create_new_menu_item,
     delete_existed_item,
     get_filter_data,
     get_list_menu_items,
-    get_list_menu_items_count,
     get_menu_item_or_404,
+    suggest_menu_items,
     update_existed_item
 )
 
@@ -28,20 +31,24 @@ router = APIRouter(
     dependencies=[Depends(get_auth_user_by_token)]
 )
 
+menu_items_etag = conditional_get(MenuItem)
 
-@router.get("/filters")
+
+@router.get("/filters", dependencies=[Depends(menu_items_etag)])
 async def get_menu_items_filter() -> List[MenuItemFilterResponse]:
     result = await get_filter_data()
     return [MenuItemFilterResponse.from_orm(category) for category in result]
 
 
 @router.get("/", response_model=ListMenuItemResponse)
-async def get_menu_items(
-        menu_items = Depends(get_list_menu_items),
-        result_count = Depends(get_list_menu_items_count)
-):
-    result_items = [MenuItemResponseSchema.from_orm(item) for item in menu_items]
-    return {"status": "success", "results": result_count, "menu_items": result_items}
+async def get_menu_items(menu_items_page = Depends(get_list_menu_items)):
+    result_items = [MenuItemResponseSchema.from_orm(item) for item in menu_items_page.items]
+    return {"status": "success", "results": menu_items_page.total, "menu_items": result_items}
+
+
+@router.get("/suggest", response_model=MenuItemSuggestResponse)
+async def get_menu_item_suggestions(suggestions: List[MenuItemSuggestion] = Depends(suggest_menu_items)):
+    return MenuItemSuggestResponse(status="success", suggestions=suggestions)
 
 
 @router.get("/{menu_item_id}")
@@ -51,8 +58,8 @@ async def get_one_menu_item(menu_item: MenuItem = Depends(get_menu_item_or_404))
 
 @router.post('/', status_code=status.HTTP_201_CREATED, response_model=MenuItemResponse)
 async def create_menu_item(payload: MenuItemCreateSchema) -> MenuItemResponse:
-    new_item_data = await create_new_menu_item(payload.dict())
-    return MenuItemResponse(status="success", menu_item=MenuItemResponseSchema(**new_item_data))
+    new_item = await create_new_menu_item(payload.dict())
+    return MenuItemResponse(status="success", menu_item=MenuItemResponseSchema.from_orm(new_item))
 
 
 @router.patch("/{menu_item_id}")
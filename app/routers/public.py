@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Request, Response, status
+
+from app.models import MenuCategory
+from app.service_layer.events_service import get_events_feed
+from app.service_layer.menu_items_service import get_menu_snapshot
+from app.service_layer.snapshots import SnapshotDocument
+from app.utils import etag_matches
+
+router = APIRouter(
+    prefix="/api/public",
+    tags=["public"]
+)
+
+
+def snapshot_response(request: Request, document: SnapshotDocument) -> Response:
+    headers = {
+        "ETag": document.etag,
+        "Cache-Control": "public, no-cache",
+        "X-Snapshot-Version": str(document.version),
+    }
+    if etag_matches(request.headers.get("if-none-match"), document.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=document.body, media_type="application/json", headers=headers)
+
+
+@router.get("/menu")
+async def get_public_menu(request: Request, category: MenuCategory | None = None) -> Response:
+    document = await get_menu_snapshot(category)
+    return snapshot_response(request, document)
+
+
+@router.get("/events")
+async def get_public_events(request: Request) -> Response:
+    document = await get_events_feed()
+    return snapshot_response(request, document)
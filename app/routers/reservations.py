@@ -1,4 +1,7 @@
-from fastapi import APIRouter, status, Depends, Response
+from datetime import date
+
+from fastapi import APIRouter, status, Depends, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from typing import List
 
 from app.models import Reservations
@@ -7,19 +10,26 @@ from app.schemas.reservations import (
     ReservationResponse,
     ReservationCreateSchema,
     ReservationStatisticSchema,
+    ReservationImportResponse,
+    ReservationAvailabilityResponse,
+    ReservationSlot,
     PeopleCountStatistic
 )
 from app.service_layer.reservations_service import (
     create_new_reservation,
     delete_exist_reservation,
-    get_count_of_list_reservations,
+    export_reservations,
     get_list_reservations,
     get_people_count_stat,
     get_reservation_or_404,
+    get_reservations_availability,
     get_reservations_count_statistics,
+    import_reservations,
     update_exist_reservation,
+    DataFormat,
     StatisticType
 )
+from app.dependencies import conditional_get
 from app.oauth2 import get_auth_user_by_token
 
 router = APIRouter(
@@ -28,6 +38,8 @@ router = APIRouter(
     dependencies=[Depends(get_auth_user_by_token)]
 )
 
+reservations_etag = conditional_get(Reservations)
+
 
 @router.get("/statistics")
 async def get_reservations_statistics(
@@ -43,12 +55,43 @@ async def get_people_count_statistics(type: StatisticType = StatisticType.WEEK.v
     return result
 
 
-@router.get("/")
-async def get_reservations(
-        result_count = Depends(get_count_of_list_reservations),
-        reservations = Depends(get_list_reservations)
-):
-    return {"status": "success", "results": result_count, "reservations": reservations}
+@router.get("/availability", response_model=ReservationAvailabilityResponse)
+async def get_availability(
+        slots: List[ReservationSlot] = Depends(get_reservations_availability)
+) -> ReservationAvailabilityResponse:
+    return ReservationAvailabilityResponse(status="success", slots=slots)
+
+
+@router.post("/import", response_model=ReservationImportResponse)
+async def import_reservations_file(
+        file: UploadFile = File(...),
+        format: DataFormat | None = None
+) -> ReservationImportResponse:
+    return await import_reservations(file, format)
+
+
+@router.get("/export")
+async def export_reservations_file(
+        format: DataFormat = DataFormat.NDJSON,
+        date_from: date | None = None,
+        date_to: date | None = None
+) -> StreamingResponse:
+    media_type = "text/csv" if format == DataFormat.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        export_reservations(format, date_from, date_to),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="reservations.{format.value}"'}
+    )
+
+
+@router.get("/", dependencies=[Depends(reservations_etag)])
+async def get_reservations(reservations_page = Depends(get_list_reservations)):
+    return {
+        "status": "success",
+        "results": reservations_page.results,
+        "reservations": reservations_page.reservations,
+        "next_cursor": reservations_page.next_cursor
+    }
 
 
 @router.get("/{reservation_id}")
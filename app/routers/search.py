@@ -0,0 +1,18 @@
+from typing import List
+
+from fastapi import APIRouter, Depends
+
+from app.oauth2 import get_auth_user_by_token
+from app.schemas.search import SearchResponse, SearchResult
+from app.service_layer.search_service import search_catalog
+
+router = APIRouter(
+    prefix="/api/search",
+    tags=["search"],
+    dependencies=[Depends(get_auth_user_by_token)]
+)
+
+
+@router.get("/", response_model=SearchResponse)
+async def search(results: List[SearchResult] = Depends(search_catalog)) -> SearchResponse:
+    return SearchResponse(status="success", results=results)
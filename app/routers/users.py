@@ -1,14 +1,17 @@
+import os
+
 from fastapi import APIRouter, status, Depends, Response
 
 from app.dependencies import upload_file_with_directory
+from app.images import image_worker
 from app.schemas.user import UserListResponse, CreateUser, UserResponse, BaseUser, UpdateUser
 from app.oauth2 import get_auth_user_by_token
+from app.settings import settings
 from app.service_layer.users_service import (
     add_avatar_for_user,
     create_new_user,
     delete_existed_user,
     get_list_users,
-    get_count_of_list_users,
     update_existed_user
 )
 
@@ -23,14 +26,14 @@ upload_user_file = upload_file_with_directory("users")
 
 
 @router.get("/")
-async def get_all_users(users = Depends(get_list_users), count = Depends(get_count_of_list_users)) -> UserListResponse:
-    return UserListResponse(status="success", result=count, users=users)
+async def get_all_users(users_page = Depends(get_list_users)) -> UserListResponse:
+    return UserListResponse(status="success", result=users_page.total, users=users_page.items)
 
 
 @router.post("/")
 async def create_user(payload: CreateUser) -> UserResponse:
-    user_data = await create_new_user(payload.dict())
-    return UserResponse(status="success", user=BaseUser(**user_data))
+    user = await create_new_user(payload.dict())
+    return UserResponse(status="success", user=BaseUser.from_orm(user))
 
 
 @router.patch("/{user_id}")
@@ -48,4 +51,5 @@ async def delete_user(user_id: int):
 @router.post("/{user_id}/upload-image", status_code=status.HTTP_201_CREATED)
 async def upload_image(user_id: int, upload_file_name: str = Depends(upload_user_file), ):
     await add_avatar_for_user(user_id, upload_file_name)
+    image_worker.enqueue(os.path.join(settings.STATIC_FILES_DIR, "users", upload_file_name))
     return Response(status_code=status.HTTP_201_CREATED)
\ No newline at end of file
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 from datetime import datetime
 
+from app.images import get_derivative_urls
+from app.schemas.images import ImageDerivative
+
 
 class EventBaseSchema(BaseModel):
     name: str
@@ -10,6 +13,11 @@ class EventBaseSchema(BaseModel):
     createdAt: datetime = Field(default_factory=datetime.now)
     updatedAt: datetime = Field(default_factory=datetime.now)
     image: str | None = None
+    image_derivatives: List[ImageDerivative] = []
+
+    @validator("image_derivatives", always=True)
+    def set_image_derivatives(cls, value, values):
+        return get_derivative_urls(values.get("image"))
 
     class Config:
         orm_mode = True
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class ImageDerivative(BaseModel):
+    width: int
+    format: str
+    url: str
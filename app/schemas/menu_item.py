@@ -74,6 +74,22 @@ class MenuItemResponse(BaseModel):
     menu_item: MenuItemResponseSchema
 
 
+class MenuItemSuggestion(BaseModel):
+    id: int
+    name: str | None
+    sub_name: str | None
+    category: MenuCategory | None
+    sub_category: str | None
+
+    class Config:
+        orm_mode = True
+
+
+class MenuItemSuggestResponse(BaseModel):
+    status: str
+    suggestions: List[MenuItemSuggestion]
+
+
 class MenuItemFilterResponse(BaseModel):
     category: str
     sub_categories: List[str]
@@ -30,7 +30,7 @@ class ResponseReservation(ReservationBaseSchema):
 
 class ReservationCreateSchema(BaseModel):
     date_reservation: datetime
-    people_count: int
+    people_count: int = Field(gt=0)
     phone_number: str
     email: Optional[str]
     comment: Optional[str]
@@ -43,7 +43,7 @@ class ReservationCreateSchema(BaseModel):
 
 class ReservationUpdateSchema(BaseModel):
     date_reservation: Optional[datetime]
-    people_count: Optional[int]
+    people_count: Optional[int] = Field(gt=0)
     phone_number: Optional[str]
     email: Optional[str]
     comment: Optional[str]
@@ -60,11 +60,45 @@ class ListReservationsResponse(BaseModel):
     reservations: List[ReservationBaseSchema]
 
 
+class ReservationListPage(BaseModel):
+    reservations: List[ResponseReservation]
+    results: int
+    next_cursor: str | None
+
+
+class ReservationImportError(BaseModel):
+    row: int
+    errors: List[dict]
+
+
+class ReservationImportResponse(BaseModel):
+    status: str
+    imported: int
+    failed: int
+    errors: List[ReservationImportError]
+
+
 class ReservationResponse(BaseModel):
     status: str
     reservation: ResponseReservation
 
 
+class ReservationSlot(BaseModel):
+    start: datetime
+    end: datetime
+    reservations: int
+    people_count: int
+    free_tables: int
+    free_seats: int
+    largest_free_table: int
+    overbooked: bool
+
+
+class ReservationAvailabilityResponse(BaseModel):
+    status: str
+    slots: List[ReservationSlot]
+
+
 class ReservationStatisticSchema(BaseModel):
     day_date: date
     reserved_count: int
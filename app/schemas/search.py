@@ -0,0 +1,26 @@
+from enum import Enum
+from typing import List
+
+from pydantic import BaseModel
+
+
+class SearchResultType(str, Enum):
+    EVENT = "event"
+    MENU_ITEM = "menu_item"
+    USER = "user"
+
+
+class SearchResult(BaseModel):
+    type: SearchResultType
+    id: int
+    title: str | None
+    subtitle: str | None
+    rank: float
+
+    class Config:
+        orm_mode = True
+
+
+class SearchResponse(BaseModel):
+    status: str
+    results: List[SearchResult]
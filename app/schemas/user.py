@@ -1,11 +1,19 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from typing import List, Optional
 
+from app.images import get_derivative_urls
+from app.schemas.images import ImageDerivative
+
 class BaseUser(BaseModel):
     id: int
     name: str | None
     username: str
     avatar: str | None
+    avatar_derivatives: List[ImageDerivative] = []
+
+    @validator("avatar_derivatives", always=True)
+    def set_avatar_derivatives(cls, value, values):
+        return get_derivative_urls(values.get("avatar"))
 
     class Config:
         orm_mode = True
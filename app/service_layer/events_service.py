@@ -0,0 +1,68 @@
+from fastapi import HTTPException, status
+
+from app.models import Events
+from app.repository.alchemy_repo import Page
+from app.repository.events import events_repository_factory
+from app.schemas.events import ResponseEvent
+from app.service_layer.snapshots import JSONSnapshot, SnapshotDocument
+from app.settings import settings
+
+
+async def get_event_or_404(event_id: int) -> Events:
+    repository = events_repository_factory()
+    exists_event = await repository.get_instance(instance_id=event_id)
+    if not exists_event:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No event with id: {event_id}")
+
+    return exists_event
+
+
+async def get_list_events(limit: int = 10, page: int = 1, search: str = "") -> Page:
+    repository = events_repository_factory()
+    events_page = await repository.get_list_with_count(limit=limit, page=page, search=search)
+    return events_page
+
+
+async def create_new_event(data: dict) -> Events:
+    repository = events_repository_factory()
+    new_event = await repository.create_instance(data)
+    events_feed.invalidate()
+    return new_event
+
+
+async def update_existed_event(event_id: int, data: dict) -> Events:
+    repository = events_repository_factory()
+    updated_event = await repository.update_instance(instance_id=event_id, data=data)
+    if not updated_event:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No event with id: {event_id}")
+    events_feed.invalidate()
+    return updated_event
+
+
+async def delete_existed_event(event_id: int):
+    repository = events_repository_factory()
+    deleted_event = await repository.delete_instance(instance_id=event_id)
+    if not deleted_event:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No event with id: {event_id}")
+    events_feed.invalidate()
+
+
+async def add_image_for_event(event_id: int, file_name: str):
+    repository = events_repository_factory()
+    event = await repository.update_image_for_event(event_id=event_id, image_name=file_name)
+    if not event:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No event with id: {event_id}")
+    events_feed.invalidate()
+
+
+async def build_events_feed() -> dict:
+    repository = events_repository_factory()
+    events = await repository.get_published(limit=settings.EVENTS_FEED_SIZE)
+    return {None: {"events": [ResponseEvent.from_orm(event).dict() for event in events]}}
+
+
+events_feed = JSONSnapshot(build_events_feed, max_age=settings.EVENTS_FEED_MAX_AGE)
+
+
+async def get_events_feed() -> SnapshotDocument:
+    return await events_feed.get()
@@ -1,16 +1,24 @@
+import asyncio
+import time
+from itertools import groupby
 from typing import Annotated, List
 
-from fastapi import Query
+from fastapi import HTTPException, Query, status
 
 from app.models import MenuItem, MenuCategory
+from app.prefix_index import PrefixIndex
+from app.repository.alchemy_repo import Page
 from app.repository.menu_items import menu_items_repository_factory
+from app.schemas.menu_item import MenuItemResponseSchema, MenuItemSuggestion
+from app.service_layer.snapshots import JSONSnapshot, SnapshotDocument
+from app.settings import settings
 
 
 async def get_menu_item_or_404(menu_item_id: int) -> MenuItem:
     repository = menu_items_repository_factory()
     exists_item = await repository.get_instance(instance_id=menu_item_id)
     if not exists_item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No event with id: {menu_item_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No menu item with id: {menu_item_id}")
 
     return exists_item
 
@@ -20,45 +28,102 @@ async def get_list_menu_items(
         page: int = 1,
         category: Annotated[List[MenuCategory], Query()] = [],
         sub_category: Annotated[List[str], Query()] = []
-):
+) -> Page:
     repository = menu_items_repository_factory()
     category_values = [cat.value for cat in category]
-    menu_items = await repository.get_list(
+    menu_items_page = await repository.get_list_with_count(
         limit=limit, page=page, category=category_values, sub_category=sub_category)
-    return menu_items
+    return menu_items_page
 
 
-async def get_list_menu_items_count(
-        category: Annotated[List[MenuCategory], Query()] = [],
-        sub_category: Annotated[List[str], Query()] = []
-):
-    repository = menu_items_repository_factory()
-    category_values = [cat.value for cat in category]
-    items_count = await repository.get_count_of_list(category=category_values, sub_category=sub_category)
-    return items_count
-
-
-async def create_new_menu_item(data: dict):
+async def create_new_menu_item(data: dict) -> MenuItem:
     repository = menu_items_repository_factory()
-    new_item_id = await repository.create_instance(data)
-    data.update(id=new_item_id)
-    return data
+    new_item = await repository.create_instance(data)
+    menu_snapshot.invalidate()
+    index_menu_item(new_item)
+    return new_item
 
 
-async def update_existed_item(menu_item_id: int, data: dict):
+async def update_existed_item(menu_item_id: int, data: dict) -> MenuItem:
     repository = menu_items_repository_factory()
-    menu_item = await get_menu_item_or_404(menu_item_id)
-    updated_item = await repository.update_instance(instance_id=menu_item.id, data=data)
+    updated_item = await repository.update_instance(instance_id=menu_item_id, data=data)
+    if not updated_item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No menu item with id: {menu_item_id}")
+    menu_snapshot.invalidate()
+    index_menu_item(updated_item)
     return updated_item
 
 
 async def delete_existed_item(menu_item_id: int):
     repository = menu_items_repository_factory()
-    menu_item = await get_menu_item_or_404(menu_item_id)
-    await repository.delete_instance(instance_id=menu_item.id)
+    deleted_item = await repository.delete_instance(instance_id=menu_item_id)
+    if not deleted_item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No menu item with id: {menu_item_id}")
+    menu_snapshot.invalidate()
+    menu_suggestions.remove(menu_item_id)
 
 
 async def get_filter_data():
     repository = menu_items_repository_factory()
     categories = await repository.get_category_with_subcategory()
-    return categories
\ No newline at end of file
+    return categories
+
+
+async def build_menu_snapshot() -> dict:
+    repository = menu_items_repository_factory()
+    menu_items = await repository.get_menu()
+    categories = {category.value: [] for category in MenuCategory}
+    for category, category_items in groupby(menu_items, key=lambda item: item.category):
+        category_value = category.value if isinstance(category, MenuCategory) else category
+        categories[category_value] = [
+            {
+                "sub_category": sub_category,
+                "menu_items": [MenuItemResponseSchema.from_orm(item).dict() for item in sub_category_items]
+            }
+            for sub_category, sub_category_items in groupby(category_items, key=lambda item: item.sub_category)
+        ]
+
+    documents = {
+        category: {"categories": [{"category": category, "sub_categories": sub_categories}]}
+        for category, sub_categories in categories.items()
+    }
+    documents[None] = {
+        "categories": [
+            {"category": category, "sub_categories": sub_categories}
+            for category, sub_categories in categories.items() if sub_categories
+        ]
+    }
+    return documents
+
+
+menu_snapshot = JSONSnapshot(build_menu_snapshot, max_age=settings.MENU_SNAPSHOT_MAX_AGE)
+
+
+async def get_menu_snapshot(category: MenuCategory | None = None) -> SnapshotDocument:
+    return await menu_snapshot.get(category.value if category else None)
+
+
+menu_suggestions = PrefixIndex()
+menu_suggestions_lock = asyncio.Lock()
+
+
+def index_menu_item(menu_item):
+    menu_suggestions.add(menu_item.id, (menu_item.name, menu_item.sub_name), MenuItemSuggestion.from_orm(menu_item))
+
+
+async def load_menu_suggestions():
+    repository = menu_items_repository_factory()
+    rows = await repository.get_suggestion_rows()
+    menu_suggestions.rebuild((row.id, (row.name, row.sub_name), MenuItemSuggestion.from_orm(row)) for row in rows)
+
+
+async def suggest_menu_items(
+        q: Annotated[str, Query(min_length=1, max_length=100)],
+        limit: Annotated[int, Query(ge=1, le=50)] = 10
+) -> List[MenuItemSuggestion]:
+    # writes in other worker processes only reach this index on the periodic reload
+    if time.monotonic() - menu_suggestions.built_at > settings.MENU_SUGGEST_MAX_AGE:
+        async with menu_suggestions_lock:
+            if time.monotonic() - menu_suggestions.built_at > settings.MENU_SUGGEST_MAX_AGE:
+                await load_menu_suggestions()
+    return menu_suggestions.search(q, limit)
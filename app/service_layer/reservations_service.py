@@ -1,18 +1,32 @@
+import csv
+import io
+import json
 from datetime import datetime, date, timedelta
 from enum import Enum
-from typing import List
+from itertools import islice
+from typing import AsyncIterator, Iterator, List
+from zoneinfo import ZoneInfo
 
-from fastapi import status, HTTPException
+from fastapi import status, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 
+from app.availability import Booking, can_seat, get_slot_numbers, get_slots, get_slots_capacity
 from app.models import Reservations
 from app.schemas.reservations import (
     ResponseReservation,
     ReservationCreateSchema,
+    ReservationListPage,
+    ReservationSlot,
     ReservationStatisticSchema,
     ReservationUpdateSchema,
-    PeopleCountStatistic
+    PeopleCountStatistic,
+    ReservationImportError,
+    ReservationImportResponse
 )
 from app.repository.reservation import reservations_repo_factory
+from app.settings import settings
+from app.utils import encode_cursor, decode_cursor
 
 
 def get_date_filter(date_from: date | None = None, date_to: date | None = None):
@@ -28,59 +42,144 @@ async def get_list_reservations(
         date_to: date | None = None,
         limit: int = 10,
         page: int = 1,
-        order: str | None = None) -> List[ResponseReservation]:
+        order: str | None = None,
+        cursor: str | None = None) -> ReservationListPage:
 
     date_filters = get_date_filter(date_from, date_to)
 
     repository = reservations_repo_factory()
-    reservations = await repository.get_list(
+    after = None
+    if cursor:
+        try:
+            after = repository.parse_cursor_values(decode_cursor(cursor), order)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    reservations, result_count = await repository.get_list_with_count(
         limit=limit,
         page=page,
         date_from=date_filters.get("date_from"),
         date_to=date_filters.get("date_to"),
-        order=order
+        order=order,
+        after=after
     )
-    return [ResponseReservation.from_orm(reservation) for reservation in reservations]
-
-
-async def get_count_of_list_reservations(
-        date_from: date | None = None,
-        date_to: date | None = None) -> int:
-    date_filters = get_date_filter(date_from, date_to)
-    repository = reservations_repo_factory()
-    result_count = await repository.get_count_of_list(
-        date_from=date_filters.get("date_from"),
-        date_to=date_filters.get("date_to"))
+    next_cursor = None
+    if reservations and len(reservations) == limit:
+        next_cursor = encode_cursor(repository.get_cursor_values(reservations[-1], order))
 
-    return result_count
+    return ReservationListPage(
+        reservations=[ResponseReservation.from_orm(reservation) for reservation in reservations],
+        results=result_count,
+        next_cursor=next_cursor
+    )
 
 
 async def get_reservation_or_404(reservation_id: int) -> Reservations:
     repository = reservations_repo_factory()
     exists_reservation = await repository.get_instance(reservation_id)
     if not exists_reservation:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No event with id: {reservation_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No reservation with id: {reservation_id}")
 
     return exists_reservation
 
 
+def get_venue_datetime(value: datetime) -> datetime:
+    """Naive times are venue local time, asyncpg would otherwise store them in the server's timezone."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=ZoneInfo(settings.VENUE_TIMEZONE))
+    return value
+
+
+def get_booking(date_reservation: datetime, people_count: int) -> Booking:
+    date_reservation = get_venue_datetime(date_reservation)
+    duration = timedelta(minutes=settings.RESERVATION_DURATION_MINUTES)
+    return Booking(start=date_reservation, end=date_reservation + duration, people_count=people_count)
+
+
+async def get_reservations_availability(date_from: date, date_to: date | None = None) -> List[ReservationSlot]:
+    date_to = date_to or date_from
+    if date_to < date_from or (date_to - date_from).days >= settings.RESERVATION_AVAILABILITY_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be ordered and at most {settings.RESERVATION_AVAILABILITY_MAX_DAYS} days"
+        )
+
+    slots = get_slots(
+        date_from,
+        date_to,
+        opens_at=settings.VENUE_OPENS_AT,
+        closes_at=settings.VENUE_CLOSES_AT,
+        slot_length=timedelta(minutes=settings.RESERVATION_SLOT_MINUTES),
+        timezone=ZoneInfo(settings.VENUE_TIMEZONE)
+    )
+    if not slots:
+        return []
+
+    repository = reservations_repo_factory()
+    duration = timedelta(minutes=settings.RESERVATION_DURATION_MINUTES)
+    reservations = await repository.get_reservations_starting_between(slots[0][0] - duration, slots[-1][1])
+    bookings = [get_booking(reservation.date_reservation, reservation.people_count) for reservation in reservations]
+    capacity = get_slots_capacity(slots, bookings, settings.VENUE_TABLES)
+    return [ReservationSlot(**slot._asdict()) for slot in capacity]
+
+
+async def check_reservation_capacity(repository, booking: Booking, exclude_id: int | None = None):
+    """Must run inside a transaction, the slot locks are held until it ends."""
+    await repository.lock_slots(get_slot_numbers(booking, timedelta(minutes=settings.RESERVATION_SLOT_MINUTES)))
+    duration = timedelta(minutes=settings.RESERVATION_DURATION_MINUTES)
+    reservations = await repository.get_reservations_starting_between(
+        booking.start - duration, booking.end, exclude_id=exclude_id, primary=True)
+    bookings = [get_booking(reservation.date_reservation, reservation.people_count) for reservation in reservations]
+    if not can_seat(booking, bookings, settings.VENUE_TABLES):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"No free tables for {booking.people_count} people at {booking.start.isoformat()}"
+        )
+
+
 async def create_new_reservation(data: ReservationCreateSchema) -> ResponseReservation:
     repository = reservations_repo_factory()
-    reservation_id = await repository.create_instance(data.dict())
-    return ResponseReservation(id=reservation_id, **data.dict())
+    values = data.dict()
+    values["date_reservation"] = get_venue_datetime(values["date_reservation"])
+    if not settings.RESERVATION_ENFORCE_CAPACITY:
+        reservation = await repository.create_instance(values)
+        return ResponseReservation.from_orm(reservation)
+
+    async with repository.database.transaction():
+        await check_reservation_capacity(repository, get_booking(values["date_reservation"], values["people_count"]))
+        reservation = await repository.create_instance(values)
+    return ResponseReservation.from_orm(reservation)
 
 
 async def update_exist_reservation(data: ReservationUpdateSchema, reservation_id: int) -> ResponseReservation:
     repository = reservations_repo_factory()
-    reservation = await get_reservation_or_404(reservation_id)
-    updated_reservation = await repository.update_instance(reservation.id, data.dict(exclude_unset=True))
+    changes = data.dict(exclude_unset=True)
+    if changes.get("date_reservation"):
+        changes["date_reservation"] = get_venue_datetime(changes["date_reservation"])
+    if not settings.RESERVATION_ENFORCE_CAPACITY or not {"date_reservation", "people_count"} & changes.keys():
+        updated_reservation = await repository.update_instance(reservation_id, changes)
+        if not updated_reservation:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No reservation with id: {reservation_id}")
+        return ResponseReservation.from_orm(updated_reservation)
+
+    async with repository.database.transaction():
+        reservation = await repository.get_instance_for_update(reservation_id)
+        if not reservation:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No reservation with id: {reservation_id}")
+        booking = get_booking(
+            changes.get("date_reservation") or reservation.date_reservation,
+            changes.get("people_count") or reservation.people_count
+        )
+        await check_reservation_capacity(repository, booking, exclude_id=reservation_id)
+        updated_reservation = await repository.update_instance(reservation_id, changes)
     return ResponseReservation.from_orm(updated_reservation)
 
 
 async def delete_exist_reservation(reservation_id: int):
     repository = reservations_repo_factory()
-    reservation = await get_reservation_or_404(reservation_id)
-    await repository.delete_instance(reservation.id)
+    deleted_reservation = await repository.delete_instance(reservation_id)
+    if not deleted_reservation:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No reservation with id: {reservation_id}")
 
 
 class StatisticType(str, Enum):
@@ -114,3 +213,194 @@ async def get_people_count_stat(statistic_type: StatisticType = StatisticType.WE
     reservations = await repository.get_people_count_tables_for_period(start_range=start_range, end_range=end_range)
     statistics = [PeopleCountStatistic.from_orm(reservation).dict() for reservation in reservations]
     return statistics
+
+
+class DataFormat(str, Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+
+def get_upload_format(file: UploadFile) -> DataFormat:
+    if file.content_type in ("text/csv", "application/csv") or (file.filename or "").lower().endswith(".csv"):
+        return DataFormat.CSV
+    return DataFormat.NDJSON
+
+
+def iter_csv_rows(text_file: io.TextIOBase) -> Iterator[tuple[int, dict | None]]:
+    reader = csv.DictReader(text_file)
+    for row_number, row in enumerate(reader, start=1):
+        yield row_number, {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+def iter_ndjson_rows(text_file: io.TextIOBase) -> Iterator[tuple[int, dict | None]]:
+    row_number = 0
+    for line in text_file:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row_number, row if isinstance(row, dict) else None
+
+
+def take_batch(rows: Iterator, size: int) -> tuple[list, str | None]:
+    """Read up to size rows, a decoding or CSV error ends the file but keeps the rows read before it."""
+    batch = []
+    try:
+        for row in islice(rows, size):
+            batch.append(row)
+    except (UnicodeDecodeError, csv.Error) as error:
+        return batch, str(error)
+    return batch, None
+
+
+def split_by_slot_locks(rows: list[tuple[int, dict, Booking]], max_locks: int) -> Iterator[list]:
+    """Cut rows ordered by start so one transaction never holds more than max_locks slot locks."""
+    slot_length = timedelta(minutes=settings.RESERVATION_SLOT_MINUTES)
+    chunk, slot_numbers = [], set()
+    for row in rows:
+        row_slots = set(get_slot_numbers(row[2], slot_length))
+        if chunk and len(slot_numbers | row_slots) > max_locks:
+            yield chunk
+            chunk, slot_numbers = [], set()
+        chunk.append(row)
+        slot_numbers |= row_slots
+    if chunk:
+        yield chunk
+
+
+async def import_checked_rows(repository, rows: list[tuple[int, dict, Booking]]) -> tuple[int, list[int]]:
+    """Insert the rows that fit next to the stored reservations and the earlier rows of the chunk.
+
+    Returns the imported count and the numbers of the rejected rows.
+    """
+    slot_length = timedelta(minutes=settings.RESERVATION_SLOT_MINUTES)
+    duration = timedelta(minutes=settings.RESERVATION_DURATION_MINUTES)
+    async with repository.database.transaction():
+        await repository.lock_slots(
+            slot_number for _, _, booking in rows for slot_number in get_slot_numbers(booking, slot_length))
+        reservations = await repository.get_reservations_starting_between(
+            min(booking.start for _, _, booking in rows) - duration,
+            max(booking.end for _, _, booking in rows),
+            primary=True
+        )
+        seated = [get_booking(reservation.date_reservation, reservation.people_count) for reservation in reservations]
+        accepted, rejected = [], []
+        for row_number, values, booking in rows:
+            if can_seat(booking, seated, settings.VENUE_TABLES):
+                seated.append(booking)
+                accepted.append(values)
+            else:
+                rejected.append(row_number)
+        imported = await repository.create_instances(accepted)
+    return imported, rejected
+
+
+async def import_batch(repository, batch: list, errors: list) -> tuple[int, int]:
+    """Validate and insert one batch, returns the imported and failed counts and extends errors."""
+    imported = 0
+    failed = 0
+    valid_rows = []
+    for row_number, row in batch:
+        try:
+            if row is None:
+                raise ValueError("Row is not a JSON object")
+            values = ReservationCreateSchema(**row).dict()
+            values["date_reservation"] = get_venue_datetime(values["date_reservation"])
+            valid_rows.append((row_number, values))
+        except (ValidationError, ValueError) as error:
+            failed += 1
+            if len(errors) < settings.RESERVATION_IMPORT_MAX_ERRORS:
+                row_errors = error.errors() if isinstance(error, ValidationError) else [{"msg": str(error)}]
+                errors.append(ReservationImportError(row=row_number, errors=row_errors))
+
+    if not settings.RESERVATION_ENFORCE_CAPACITY:
+        imported += await repository.create_instances([values for _, values in valid_rows])
+        return imported, failed
+
+    booked_rows = sorted(
+        ((row_number, values, get_booking(values["date_reservation"], values["people_count"]))
+         for row_number, values in valid_rows),
+        key=lambda row: row[2].start
+    )
+    for rows_chunk in split_by_slot_locks(booked_rows, settings.RESERVATION_IMPORT_MAX_SLOT_LOCKS):
+        chunk_imported, rejected = await import_checked_rows(repository, rows_chunk)
+        imported += chunk_imported
+        failed += len(rejected)
+        for row_number in rejected:
+            if len(errors) < settings.RESERVATION_IMPORT_MAX_ERRORS:
+                errors.append(ReservationImportError(row=row_number, errors=[{"msg": "No free tables"}]))
+    return imported, failed
+
+
+async def import_reservations(file: UploadFile, data_format: DataFormat | None = None) -> ReservationImportResponse:
+    data_format = data_format or get_upload_format(file)
+    text_file = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    rows = iter_csv_rows(text_file) if data_format == DataFormat.CSV else iter_ndjson_rows(text_file)
+
+    repository = reservations_repo_factory()
+    imported = 0
+    failed = 0
+    errors = []
+    next_row_number = 1
+    # the upload is spooled to disk by starlette; parse it batch by batch off the event loop
+    while True:
+        batch, read_error = await run_in_threadpool(take_batch, rows, settings.RESERVATION_IMPORT_BATCH_SIZE)
+        if batch:
+            next_row_number = batch[-1][0] + 1
+            batch_imported, batch_failed = await import_batch(repository, batch, errors)
+            imported += batch_imported
+            failed += batch_failed
+        if read_error is not None or not batch:
+            break
+
+    if read_error is not None:
+        # earlier batches are already committed, so report how far the file got instead of failing it whole
+        failed += 1
+        errors.append(ReservationImportError(row=next_row_number, errors=[{"msg": f"Could not read file: {read_error}"}]))
+        return ReservationImportResponse(status="error", imported=imported, failed=failed, errors=errors)
+
+    return ReservationImportResponse(status="success", imported=imported, failed=failed, errors=errors)
+
+
+async def export_reservations(
+        data_format: DataFormat = DataFormat.NDJSON,
+        date_from: date | None = None,
+        date_to: date | None = None) -> AsyncIterator[str]:
+    date_filters = get_date_filter(date_from, date_to)
+    repository = reservations_repo_factory()
+    fields = list(ResponseReservation.__fields__)
+
+    if data_format == DataFormat.CSV:
+        header = io.StringIO()
+        csv.writer(header).writerow(fields)
+        yield header.getvalue()
+
+    after = None
+    while True:
+        reservations = await repository.get_list(
+            limit=settings.RESERVATION_EXPORT_BATCH_SIZE,
+            date_from=date_filters.get("date_from"),
+            date_to=date_filters.get("date_to"),
+            after=after
+        )
+        if not reservations:
+            break
+
+        chunk = io.StringIO()
+        if data_format == DataFormat.CSV:
+            writer = csv.writer(chunk)
+            for reservation in reservations:
+                item = ResponseReservation.from_orm(reservation).dict()
+                writer.writerow([item[field] for field in fields])
+        else:
+            for reservation in reservations:
+                chunk.write(ResponseReservation.from_orm(reservation).json())
+                chunk.write("\n")
+        yield chunk.getvalue()
+
+        if len(reservations) < settings.RESERVATION_EXPORT_BATCH_SIZE:
+            break
+        after = repository.get_cursor_values(reservations[-1])
@@ -0,0 +1,16 @@
+from typing import Annotated, List
+
+from fastapi import Query
+
+from app.repository.search import search_repository_factory
+from app.schemas.search import SearchResult, SearchResultType
+
+
+async def search_catalog(
+        q: Annotated[str, Query(min_length=1, max_length=200)],
+        type: Annotated[List[SearchResultType], Query()] = [],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20
+) -> List[SearchResult]:
+    repository = search_repository_factory()
+    results = await repository.search(q, [result_type.value for result_type in type], limit=limit)
+    return [SearchResult.from_orm(result) for result in results]
@@ -0,0 +1,60 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple
+
+from pydantic.json import pydantic_encoder
+
+
+class SnapshotDocument(NamedTuple):
+    body: bytes
+    etag: str
+    version: int
+
+
+class JSONSnapshot:
+    """Pre-serialized JSON documents rebuilt only after invalidate() or once max_age passes.
+
+    The builder returns a mapping of document key to JSON-compatible payload.
+    Every document is serialized once per rebuild and served as bytes with a
+    content-hash ETag, so identical content yields the same ETag in every
+    worker process. max_age bounds how stale a worker can be when the write
+    that invalidated the data happened in another process.
+    """
+
+    def __init__(self, builder: Callable[[], Awaitable[dict[Hashable, Any]]], max_age: float):
+        self.builder = builder
+        self.max_age = max_age
+        self.version = 0
+        self._documents: dict[Hashable, SnapshotDocument] = {}
+        self._generation = 0
+        self._built_generation = -1
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._generation += 1
+
+    def is_stale(self) -> bool:
+        return self._built_generation != self._generation or time.monotonic() - self._built_at > self.max_age
+
+    async def get(self, key: Hashable = None) -> SnapshotDocument | None:
+        if self.is_stale():
+            async with self._lock:
+                if self.is_stale():
+                    await self.rebuild()
+        return self._documents.get(key)
+
+    async def rebuild(self):
+        generation = self._generation
+        payloads = await self.builder()
+        documents = {}
+        for key, payload in payloads.items():
+            body = json.dumps(payload, default=pydantic_encoder, separators=(",", ":")).encode()
+            etag = '"{}"'.format(hashlib.sha256(body).hexdigest()[:32])
+            documents[key] = SnapshotDocument(body=body, etag=etag, version=self.version + 1)
+        self.version += 1
+        self._documents = documents
+        self._built_generation = generation
+        self._built_at = time.monotonic()
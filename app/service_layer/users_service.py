@@ -1,11 +1,11 @@
-from typing import List
-
+from asyncpg.exceptions import UniqueViolationError
 from fastapi import HTTPException, status
 
+from app.repository.alchemy_repo import Page
 from app.repository.users import user_repository_factory
-from app.schemas.user import BaseUser
-from app.utils import get_hashed_password, delete_avatar
+from app.utils import get_hashed_password_async, delete_avatar
 from app.models import User
+from app.oauth2 import auth_user_cache
 
 
 async def get_user_or_404(user_id: int) -> User:
@@ -16,41 +16,48 @@ async def get_user_or_404(user_id: int) -> User:
     return user
 
 
-async def get_list_users(limit: int = 10, page: int = 1, search: str = "") -> List[BaseUser]:
-    repository = user_repository_factory()
-    users = await repository.get_list(limit, page, search)
-    return users
-
-
-async def get_count_of_list_users() -> int:
+async def get_list_users(limit: int = 10, page: int = 1, search: str = "") -> Page:
     repository = user_repository_factory()
-    users_count = await repository.get_count_of_list()
-    return users_count
+    users_page = await repository.get_list_with_count(limit, page, search)
+    return users_page
 
 
-async def create_new_user(data: dict) -> dict:
-    data["password"] = get_hashed_password(data["password"])
+async def create_new_user(data: dict) -> User:
+    data["password"] = await get_hashed_password_async(data["password"])
     repository = user_repository_factory()
-    user_id = await repository.create_instance(data)
-    data.update(id=user_id)
-    return data
+    try:
+        user = await repository.create_instance(data)
+    except UniqueViolationError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
+    return user
 
 
-async def update_existed_user(user_id: int, data: dict):
+async def update_existed_user(user_id: int, data: dict) -> User:
     repository = user_repository_factory()
-    user = await get_user_or_404(user_id)
-    updated_user = await repository.update_instance(instance_id=user.id, data=data)
+    try:
+        updated_user = await repository.update_instance(instance_id=user_id, data=data)
+    except UniqueViolationError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
+    if not updated_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    auth_user_cache.invalidate(user_id)
     return updated_user
 
 
 async def delete_existed_user(user_id: int):
     repository = user_repository_factory()
-    user = await get_user_or_404(user_id)
-    delete_avatar(user.avatar)
-    await repository.delete_instance(instance_id=user.id)
+    user = await repository.delete_instance(instance_id=user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    # uploads are content-addressed, so another user may share the same file
+    if user.avatar and not await repository.is_avatar_used(user.avatar):
+        delete_avatar(user.avatar)
+    auth_user_cache.invalidate(user_id)
 
 
 async def add_avatar_for_user(user_id: int, file_name: str):
     repository = user_repository_factory()
-    user = await repository.get_instance(instance_id=user_id)
-    await repository.update_avatar_for_user(user_id=user.id, avatar_name=file_name)
+    user = await repository.update_avatar_for_user(user_id=user_id, avatar_name=file_name)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    auth_user_cache.invalidate(user_id)
@@ -1,14 +1,55 @@
 import os
+from datetime import time
+from typing import List, Optional
+
 from pydantic import BaseSettings
 
 
 class Settings(BaseSettings):
     DB_URI: str = "postgresql://postgres:postgres@db:5432/postgres"
+    DB_REPLICA_URI: Optional[str] = None
+    DB_POOL_MIN_SIZE: int = 5
+    DB_POOL_MAX_SIZE: int = 20
+    DB_POOL_ACQUIRE_TIMEOUT: float = 10.0
+    DB_STATEMENT_TIMEOUT: int = 30 * 1000  # 30 seconds, in milliseconds
+    DB_CONNECTION_MAX_QUERIES: int = 50000
+    DB_CONNECTION_MAX_INACTIVE_LIFETIME: float = 300.0
+    DB_COMPILED_CACHE_SIZE: int = 500
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection, 0 behind pgbouncer
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
     STATIC_FILES_DIR: str = os.path.join(os.path.dirname(__file__), "static")
     ACCESS_TOKEN_EXPIRES_IN: int = 60 * 60  # 60 minutes
     REFRESH_TOKEN_EXPIRES_IN: int = 60 * 60 * 24 * 7  # 7 days
     JWT_ALGORITHM: str = "RS256"
     JWT_PUBLIC_KEY: str
     JWT_PRIVATE_KEY: str
+    AUTH_CACHE_TTL: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 1024
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 1
+    MENU_SNAPSHOT_MAX_AGE: int = 300
+    MENU_SUGGEST_MAX_AGE: int = 300
+    EVENTS_FEED_SIZE: int = 20
+    EVENTS_FEED_MAX_AGE: int = 300
+    RESERVATION_IMPORT_BATCH_SIZE: int = 1000
+    RESERVATION_IMPORT_MAX_ERRORS: int = 1000
+    RESERVATION_IMPORT_MAX_SLOT_LOCKS: int = 256  # advisory locks share the server lock table
+    RESERVATION_EXPORT_BATCH_SIZE: int = 1000
+    RESERVATION_SLOT_MINUTES: int = 30
+    RESERVATION_DURATION_MINUTES: int = 120
+    RESERVATION_AVAILABILITY_MAX_DAYS: int = 31
+    RESERVATION_ENFORCE_CAPACITY: bool = False
+    VENUE_TABLES: List[int] = [2, 2, 4, 4, 4, 6, 6, 8]  # seats per table
+    VENUE_OPENS_AT: time = time(18, 0)
+    VENUE_CLOSES_AT: time = time(2, 0)
+    VENUE_TIMEZONE: str = "UTC"
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 MiB
+    UPLOAD_MAX_SIZE: int = 10 * 1024 * 1024  # 10 MiB
+    IMAGE_DERIVATIVE_WIDTHS: List[int] = [320, 640, 1280]
+    IMAGE_DERIVATIVE_QUALITY: int = 80
+    IMAGE_DERIVATIVE_QUEUE_SIZE: int = 100
+    STATIC_CHUNK_SIZE: int = 256 * 1024
+    STATIC_STAT_CACHE_SIZE: int = 4096
+    STATIC_STAT_CACHE_TTL: int = 60
+    STATIC_GC_GRACE_PERIOD: int = 60 * 60 * 24  # 1 day
 
 settings = Settings()
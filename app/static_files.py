@@ -0,0 +1,189 @@
+import os
+import re
+import stat
+from mimetypes import guess_type
+from typing import NamedTuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.cache import TTLCache
+from app.settings import settings
+
+# content-addressed uploads and their resized derivatives never change in place
+HASHED_FILE_NAME = re.compile(r"^[0-9a-f]{64}(_w\d+)?\.[a-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+PRECOMPRESSED_ENCODINGS = {"br": ".br", "gzip": ".gz"}
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class StaticFile(NamedTuple):
+    full_path: str
+    stat_result: os.stat_result
+    variants: dict[str, tuple[str, os.stat_result]]
+
+
+class StaticFileResponse(FileResponse):
+    chunk_size = settings.STATIC_CHUNK_SIZE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # servers implementing the pathsend extension can hand the file to sendfile()
+        if "http.response.pathsend" not in scope.get("extensions", {}) or self.send_header_only:
+            await super().__call__(scope, receive, send)
+            return
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": str(self.path)})
+
+
+class StaticFileRangeResponse(Response):
+    chunk_size = settings.STATIC_CHUNK_SIZE
+
+    def __init__(self, path: str, start: int, end: int, headers: dict, media_type: str, method: str):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.send_header_only = method == "HEAD"
+        headers["content-length"] = str(end - start + 1)
+        super().__init__(status_code=206, headers=headers, media_type=media_type)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.end - self.start + 1
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # the file shrank under us; close the body rather than leave the client waiting
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """Returns the inclusive byte span of a single-range header, None when it is ignorable.
+
+    Raises HTTPException(416) for a syntactically valid but unsatisfiable range.
+    """
+    match = RANGE_HEADER.match(range_header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={"content-range": f"bytes */{size}"})
+    return start, end
+
+
+def choose_encoding(accept_encoding: str, variants: dict) -> str | None:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    for encoding in PRECOMPRESSED_ENCODINGS:
+        if encoding in variants and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with a stat cache, long-lived caching of hashed names,
+    precompressed .br/.gz variants and single-range requests."""
+
+    def __init__(self, *args, stat_cache_size: int = 4096, stat_cache_ttl: float = 60, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stat_cache = TTLCache(max_size=stat_cache_size, ttl=stat_cache_ttl)
+
+    def lookup_static_file(self, path: str) -> StaticFile | None:
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+        variants = {}
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS.items():
+            try:
+                variant_stat = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(variant_stat.st_mode):
+                variants[encoding] = (full_path + suffix, variant_stat)
+        return StaticFile(full_path=full_path, stat_result=stat_result, variants=variants)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        static_file = self.stat_cache.get(path)
+        if static_file is None:
+            try:
+                static_file = await anyio.to_thread.run_sync(self.lookup_static_file, path)
+            except PermissionError:
+                raise HTTPException(status_code=401)
+            if static_file is None:
+                raise HTTPException(status_code=404)
+            self.stat_cache.set(path, static_file)
+
+        return self.static_file_response(static_file, scope)
+
+    def static_file_response(self, static_file: StaticFile, scope: Scope) -> Response:
+        request_headers = Headers(scope=scope)
+        file_name = os.path.basename(static_file.full_path)
+        media_type = guess_type(file_name)[0] or "text/plain"
+        headers = {
+            "cache-control": IMMUTABLE_CACHE_CONTROL if HASHED_FILE_NAME.match(file_name) else REVALIDATE_CACHE_CONTROL,
+            "accept-ranges": "bytes",
+        }
+
+        file_path, stat_result = static_file.full_path, static_file.stat_result
+        range_header = request_headers.get("range")
+        if static_file.variants:
+            headers["vary"] = "Accept-Encoding"
+            encoding = None
+            if range_header is None:
+                encoding = choose_encoding(request_headers.get("accept-encoding", ""), static_file.variants)
+            if encoding is not None:
+                file_path, stat_result = static_file.variants[encoding]
+                headers["content-encoding"] = encoding
+
+        response = StaticFileResponse(
+            file_path, stat_result=stat_result, headers=headers, media_type=media_type, method=scope["method"])
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        if range_header is None or not self.if_range_matches(response.headers, request_headers):
+            return response
+        span = parse_range(range_header, stat_result.st_size)
+        if span is None:
+            return response
+
+        start, end = span
+        headers.update({
+            "content-range": f"bytes {start}-{end}/{stat_result.st_size}",
+            "etag": response.headers["etag"],
+            "last-modified": response.headers["last-modified"],
+        })
+        return StaticFileRangeResponse(
+            file_path, start, end, headers=headers, media_type=media_type, method=scope["method"])
+
+    def if_range_matches(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        return if_range in (response_headers["etag"], response_headers["last-modified"])
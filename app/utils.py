@@ -1,4 +1,9 @@
+import asyncio
+import base64
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 
 from passlib.context import CryptContext
 
@@ -7,6 +12,53 @@ from app.settings import settings
 password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class PasswordHashPool:
+    """Runs bcrypt work on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    Callers beyond the concurrency limit wait on a semaphore, which keeps the
+    queue observable instead of hidden inside the executor.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.max_waiting = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "max_waiting": self.max_waiting,
+        }
+
+
+password_hash_pool = PasswordHashPool(max_workers=settings.PASSWORD_HASH_WORKERS)
+
+
 def get_hashed_password(password: str) -> str:
     return password_context.hash(password)
 
@@ -15,8 +67,36 @@ def verify_password(password: str, hashed_pass: str) -> bool:
     return password_context.verify(password, hashed_pass)
 
 
+async def get_hashed_password_async(password: str) -> str:
+    return await password_hash_pool.run(get_hashed_password, password)
+
+
+async def verify_password_async(password: str, hashed_pass: str) -> bool:
+    return await password_hash_pool.run(verify_password, password, hashed_pass)
+
+
 def delete_avatar(url: str):
     file_name = os.path.basename(url)
     path = f'{settings.STATIC_FILES_DIR}/users/{file_name}'
     if file_name and os.path.exists(path):
         os.remove(path)
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    padding = "=" * (-len(cursor) % 4)
+    values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    if not isinstance(values, list):
+        raise ValueError("Cursor must encode a list")
+    return values
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
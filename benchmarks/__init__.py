@@ -0,0 +1,2 @@
+BENCHMARK_USERNAME = "benchmark"
+BENCHMARK_PASSWORD = "benchmark"
@@ -0,0 +1,53 @@
+"""Compare two result files written by benchmarks.run.
+
+Usage: python -m benchmarks.compare BASELINE.json CANDIDATE.json
+"""
+import argparse
+import json
+
+METRICS = [
+    ("throughput_rps", lambda result: result["throughput_rps"], True),
+    ("p50 ms", lambda result: result["latency_ms"]["p50"], False),
+    ("p95 ms", lambda result: result["latency_ms"]["p95"], False),
+    ("p99 ms", lambda result: result["latency_ms"]["p99"], False),
+    ("db tx/req", lambda result: result["db_per_request"]["transactions"], False),
+    ("db statements/req", lambda result: result["db_per_request"]["statements"], False),
+    ("errors", lambda result: result["errors"], False),
+]
+
+
+def format_change(baseline, candidate, higher_is_better: bool) -> str:
+    if baseline is None or candidate is None:
+        return ""
+    if not baseline:
+        return "" if baseline == candidate else "new"
+    change = (candidate - baseline) / baseline * 100
+    better = change > 0 if higher_is_better else change < 0
+    return f"{change:+.1f}%{' better' if better and abs(change) >= 1 else ''}"
+
+
+def main(baseline_path: str, candidate_path: str):
+    with open(baseline_path) as baseline_file, open(candidate_path) as candidate_file:
+        baseline, candidate = json.load(baseline_file), json.load(candidate_file)
+
+    print(f"baseline  {baseline['git']['commit'][:12]}{' (dirty)' if baseline['git']['dirty'] else ''}"
+          f"  concurrency {baseline['config']['concurrency']}")
+    print(f"candidate {candidate['git']['commit'][:12]}{' (dirty)' if candidate['git']['dirty'] else ''}"
+          f"  concurrency {candidate['config']['concurrency']}")
+
+    for name, candidate_result in candidate["scenarios"].items():
+        baseline_result = baseline["scenarios"].get(name)
+        if baseline_result is None:
+            continue
+        print(f"\n{name}")
+        for label, metric, higher_is_better in METRICS:
+            old, new = metric(baseline_result), metric(candidate_result)
+            print(f"  {label:<20}{str(old):>12}{str(new):>12}  {format_change(old, new, higher_is_better)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+    main(args.baseline, args.candidate)
@@ -0,0 +1,63 @@
+"""Microbenchmark for the compiled statement cache in app.db.
+
+Usage: python -m benchmarks.compiled_queries [--number 2000]
+
+Compiles the statements behind the hot repository paths with the stock
+databases Postgres connection and with the caching one, and prints the time
+per statement. No database is needed; only the Python side is measured.
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+from databases.backends.postgres import PostgresConnection
+from sqlalchemy import insert, update, delete, select
+
+from app.db import CachedCompilePostgresBackend
+from app.models import Reservations, MenuItem
+from app.repository.menu_items import MenuItemRepository
+from app.repository.reservation import ReservationRepository
+
+
+def build_queries(step: int) -> dict:
+    # repositories are created without __init__, so no database connection is needed
+    reservations = ReservationRepository.__new__(ReservationRepository)
+    menu_items = MenuItemRepository.__new__(MenuItemRepository)
+    day = datetime(2024, 1, 1) + timedelta(days=step)
+    return {
+        "reservations page": reservations.get_ordered_query(day, day + timedelta(days=7), "date_desc")
+        .limit(10).offset(step * 10),
+        "reservations seek": reservations.get_ordered_query(None, None, "date_desc", [day, step]).limit(10),
+        "menu items page": menu_items.get_filtered_query(["bar"], [f"sub {step}"]).limit(10),
+        "get instance": select(Reservations).where(Reservations.id == step),
+        "create instance": insert(Reservations).values(
+            date_reservation=day, people_count=step % 8 + 1, phone_number=str(step)),
+        "update instance": update(MenuItem).where(MenuItem.id == step).values(name=f"item {step}", updatedAt=day),
+        "delete instance": delete(MenuItem).where(MenuItem.id == step),
+    }
+
+
+def main(number: int):
+    backend = CachedCompilePostgresBackend("postgresql://localhost/benchmark", compiled_cache_size=100)
+    connections = {
+        "uncached": PostgresConnection(backend, backend._dialect),
+        "cached": backend.connection(),
+    }
+    print(f"{'statement':<20}{'uncached us':>14}{'cached us':>12}{'speedup':>10}")
+    for name in build_queries(0):
+        timings = {}
+        for label, connection in connections.items():
+            # fresh statement objects each time, SQLAlchemy memoizes the cache key per object
+            statements = [build_queries(step)[name] for step in range(number)]
+            seconds = timeit.timeit(lambda: [connection._compile(statement) for statement in statements], number=1)
+            timings[label] = seconds / number * 1e6
+        print(f"{name:<20}{timings['uncached']:>14.1f}{timings['cached']:>12.1f}"
+              f"{timings['uncached'] / timings['cached']:>9.1f}x")
+    print(f"cache: {backend.compiled_cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="statements compiled per query and connection")
+    args = parser.parse_args()
+    main(args.number)
@@ -0,0 +1,96 @@
+"""Fill the database with a reproducible data set for benchmarks.
+
+Usage: python -m benchmarks.seed [--reservations 1000000] [--menu-items 10000]
+                                 [--events 1000] [--truncate]
+
+Rows are generated server side with generate_series, so seeding a million
+reservations does not stream them through Python. The values depend only on
+the row number, so two databases seeded with the same volumes hold the same
+data. A benchmark user is created for the login scenario.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.main import database
+from app.repository.reservation import reservations_repo_factory
+from app.utils import get_hashed_password
+from benchmarks import BENCHMARK_USERNAME, BENCHMARK_PASSWORD
+
+SEED_RESERVATIONS = text("""
+    INSERT INTO reservations (date_reservation, people_count, phone_number, email, comment, served)
+    SELECT
+        date_trunc('hour', now()) - interval '180 days' + (i * 7919 % (360 * 24 * 4)) * interval '15 minutes',
+        1 + i % 8,
+        '+380' || lpad(i::text, 9, '0'),
+        CASE WHEN i % 3 = 0 THEN 'guest' || i || '@example.com' END,
+        CASE WHEN i % 10 = 0 THEN 'birthday' END,
+        i % 2 = 0
+    FROM generate_series(1, :count) AS i
+""")
+
+SEED_MENU_ITEMS = text("""
+    INSERT INTO menu_item (category, sub_category, name, sub_name, main_unit, main_price, special)
+    SELECT
+        (ARRAY['alcohol_drinks', 'non_alcohol_drinks', 'snacks', 'pizza', 'sushi'])[1 + i % 5]::menucategory,
+        'sub category ' || i % 40,
+        'menu item ' || i,
+        CASE WHEN i % 4 = 0 THEN 'variant ' || i % 7 END,
+        '100 ml',
+        (50 + i % 450)::text,
+        i % 25 = 0
+    FROM generate_series(1, :count) AS i
+""")
+
+SEED_EVENTS = text("""
+    INSERT INTO events (name, description, published)
+    SELECT 'event ' || i, 'karaoke night number ' || i, i % 10 <> 0
+    FROM generate_series(1, :count) AS i
+""")
+
+SEED_USER = text("""
+    INSERT INTO auth_user (name, username, password)
+    VALUES ('Benchmark', :username, :password)
+    ON CONFLICT (username) DO UPDATE SET password = excluded.password
+""")
+
+
+async def seed(reservations: int, menu_items: int, events: int, truncate: bool):
+    if truncate:
+        await database.execute(text(
+            "TRUNCATE reservations, reservation_daily_stats, menu_item, events RESTART IDENTITY"))
+
+    started = time.perf_counter()
+    async with database.transaction():
+        # one rollup rebuild is far cheaper than firing the row trigger a million times
+        await database.execute(text("ALTER TABLE reservations DISABLE TRIGGER reservations_daily_stats"))
+        await database.execute(SEED_RESERVATIONS.bindparams(count=reservations))
+        await database.execute(text("ALTER TABLE reservations ENABLE TRIGGER reservations_daily_stats"))
+    days_count = await reservations_repo_factory().rebuild_daily_stats()
+    print(f"seeded {reservations} reservations over {days_count} days in {time.perf_counter() - started:.1f}s")
+
+    await database.execute(SEED_MENU_ITEMS.bindparams(count=menu_items))
+    await database.execute(SEED_EVENTS.bindparams(count=events))
+    await database.execute(SEED_USER.bindparams(
+        username=BENCHMARK_USERNAME, password=get_hashed_password(BENCHMARK_PASSWORD)))
+    await database.execute(text("ANALYZE"))
+    print(f"seeded {menu_items} menu items, {events} events and user {BENCHMARK_USERNAME!r}")
+
+
+async def main(args: argparse.Namespace):
+    await database.connect()
+    try:
+        await seed(args.reservations, args.menu_items, args.events, args.truncate)
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reservations", type=int, default=1_000_000)
+    parser.add_argument("--menu-items", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=1_000)
+    parser.add_argument("--truncate", action="store_true", help="empty the seeded tables first")
+    asyncio.run(main(parser.parse_args()))